@@ -1,18 +1,35 @@
 
+import os
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-import models, database
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from starlette.concurrency import run_in_threadpool
+import models, database, passwords
+from cache import TTLCache
 
 SECRET_KEY = "your-secret-key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# "cached" reads the user (existence and role) through USER_CACHE, which the
+# write paths invalidate; "db" loads the user row on every request
+AUTH_VERIFY_MODE = os.getenv("AUTH_VERIFY_MODE", "cached")
+USER_CACHE = TTLCache(
+    maxsize=int(os.getenv("AUTH_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("AUTH_CACHE_TTL", "60")),
+)
+_DELETED = object()   # cached marker for usernames with no user row
+
+@dataclass(frozen=True)
+class CurrentUser:
+    id: int
+    username: str
+    email: str
+    role: str
+
 def get_db():
     db = database.SessionLocal()
     try:
@@ -21,12 +38,46 @@ def get_db():
         db.close()
 
 def verify_password(plain, hashed):
-    return pwd_context.verify(plain, hashed)
+    return passwords.verify_password(plain, hashed)[0]
 
 def authenticate_user(db: Session, username: str, password: str):
     user = db.query(models.User).filter(models.User.username == username).first()
-    if not user or not verify_password(password, user.hashed_password):
+    if not user:
+        return None
+    valid, new_hash = passwords.verify_password(password, user.hashed_password)
+    if not valid:
         return None
+    if new_hash:
+        # stored hash uses an old bcrypt cost; upgrade it transparently
+        user.hashed_password = new_hash
+        db.commit()
+    return user
+
+def _login_row(db: Session, username: str):
+    row = (
+        db.query(models.User.id, models.User.username, models.User.role, models.User.hashed_password)
+        .filter(models.User.username == username)
+        .first()
+    )
+    # hand the connection back to the pool while bcrypt runs
+    db.rollback()
+    return row
+
+def _store_hash(db: Session, user_id: int, new_hash: str):
+    db.query(models.User).filter(models.User.id == user_id).update({"hashed_password": new_hash})
+    db.commit()
+
+async def aauthenticate_user(db: Session, username: str, password: str):
+    """authenticate_user() for async routes: neither a thread nor a DB
+    connection is held while the hash is checked."""
+    user = await run_in_threadpool(_login_row, db, username)
+    if not user:
+        return None
+    valid, new_hash = await passwords.averify_password(password, user.hashed_password)
+    if not valid:
+        return None
+    if new_hash:
+        await run_in_threadpool(_store_hash, db, user.id, new_hash)
     return user
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -38,21 +89,44 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def invalidate_user(username: str):
+    # Call after a user is created, changed or deleted
+    USER_CACHE.pop(username)
+
+def _cached_user(username: str):
+    entry = USER_CACHE.get(username)
+    if entry is None:
+        db = database.SessionLocal()
+        try:
+            user = db.query(models.User).filter(models.User.username == username).first()
+        finally:
+            db.close()
+        entry = CurrentUser(user.id, user.username, user.email, user.role) if user else _DELETED
+        USER_CACHE.set(username, entry)
+    return entry
+
+def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str | None = payload.get("sub")
         if username is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-        role = payload.get("role")
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if user is None:
+    if AUTH_VERIFY_MODE == "db":
+        USER_CACHE.pop(username)
+    entry = _cached_user(username)
+    if entry is _DELETED:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    user.role = role
-    return user
+    # a token issued to a deleted user must not carry over to a new account
+    # that reuses the username
+    uid = payload.get("uid")
+    if uid is not None and uid != entry.id:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    # the role comes from the user row, not the token, so a promotion or
+    # demotion applies as soon as the cache entry is invalidated
+    return entry
 
 def require_role(required_role: str):
     def checker(user=Depends(get_current_user)):
@@ -0,0 +1,140 @@
+# catalogue.py
+# ───────────────────────────────────────
+# Read-through cache and conditional GET for the public catalogue (plays,
+# actors, directors, showtimes).
+#
+# Every collection carries a version counter and a last-modified time that
+# the crud write paths advance through invalidate(). ETag and Last-Modified
+# are derived from those alone, so a request carrying the current ETag is
+# answered with 304 before any row is read. If-None-Match: * and
+# If-Modified-Since don't show the entity exists, so those get their 304
+# only once the body is found in the cache or loaded (a missing id still
+# gets its 404). Full responses are cached as serialised JSON bytes keyed by
+# collection version, so a hit skips the ORM and Pydantic; entries from
+# older versions are simply never looked up again and age out of the LRU.
+import json
+import os
+import secrets
+import threading
+import time
+import zlib
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import Request, Response
+from cache import TTLCache
+from pagination import NEXT_CURSOR_HEADER
+
+CATALOGUE_CACHE = TTLCache(
+    maxsize=int(os.getenv("CATALOGUE_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("CATALOGUE_CACHE_TTL", "300")),
+)
+
+# Versions live in this process only. The nonce keeps ETags from different
+# processes or restarts from ever matching, and validators also roll over
+# once per cache TTL so a write made by another worker is picked up within
+# the same window as the cache itself.
+_NONCE = secrets.token_hex(4)
+_STARTED = time.time()
+
+# _not_modified() results
+CURRENT = "current"
+IF_EXISTS = "if-exists"
+
+_lock = threading.Lock()
+_versions: dict[str, tuple[int, float]] = {}
+
+
+def invalidate(*collections: str):
+    now = time.time()
+    with _lock:
+        for name in collections:
+            version, _ = _versions.get(name, (0, _STARTED))
+            _versions[name] = (version + 1, now)
+
+
+def _validators(collection: str, key):
+    version, modified = _versions.get(collection, (0, _STARTED))
+    epoch = int(time.time() // CATALOGUE_CACHE.ttl)
+    modified = max(modified, epoch * CATALOGUE_CACHE.ttl)
+    # different pages of one collection get different tags
+    page = zlib.crc32(repr(key).encode())
+    etag = f'W/"{collection}-{_NONCE}-{version}-{epoch}-{page:08x}"'
+    return version, etag, int(modified)
+
+
+def _not_modified(request: Request, etag: str, modified: int):
+    # CURRENT: the client holds this ETag, so what it saw still exists;
+    # IF_EXISTS: a 304 is due only if there is something to serve
+    match = request.headers.get("if-none-match")
+    if match:
+        tags = [t.strip() for t in match.split(",")]
+        if etag in tags or etag.removeprefix("W/") in tags:
+            return CURRENT
+        return IF_EXISTS if "*" in tags else None
+    since = request.headers.get("if-modified-since")
+    if since:
+        try:
+            return IF_EXISTS if modified <= parsedate_to_datetime(since).timestamp() else None
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def _serialise(schema, result):
+    if isinstance(result, list):
+        data = [schema.model_validate(row, from_attributes=True).model_dump(mode="json") for row in result]
+    else:
+        data = schema.model_validate(result, from_attributes=True).model_dump(mode="json")
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def _conditional(request: Request, collection: str, key):
+    # (headers, cache key, _not_modified() result)
+    version, etag, modified = _validators(collection, key)
+    headers = {"ETag": etag, "Last-Modified": formatdate(modified, usegmt=True)}
+    return headers, (collection, version, key), _not_modified(request, etag, modified)
+
+
+def _store(cache_key, schema, result):
+    next_cursor = None
+    if isinstance(result, tuple):
+        result, next_cursor = result
+    entry = (_serialise(schema, result), next_cursor)
+    CATALOGUE_CACHE.set(cache_key, entry)
+    return entry
+
+
+def _respond(headers: dict, entry, not_modified):
+    # reached only once the body exists, so any match earns a 304
+    if not_modified is not None:
+        return Response(status_code=304, headers=headers)
+    body, next_cursor = entry
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def cached_response(request: Request, collection: str, key, schema, load):
+    """Serve a catalogue read, calling `load()` only on a cache miss.
+
+    `load` returns a list of ORM rows, a keyset (rows, next_cursor) pair, or
+    a single ORM object; it raises HTTPException for missing entities. The
+    next cursor is cached with the body and sent in X-Next-Cursor.
+    """
+    headers, cache_key, not_modified = _conditional(request, collection, key)
+    if not_modified is CURRENT:
+        return Response(status_code=304, headers=headers)
+    entry = CATALOGUE_CACHE.get(cache_key)
+    if entry is None:
+        entry = _store(cache_key, schema, load())
+    return _respond(headers, entry, not_modified)
+
+
+async def acached_response(request: Request, collection: str, key, schema, load):
+    """cached_response() for async routes; `load` is a coroutine function."""
+    headers, cache_key, not_modified = _conditional(request, collection, key)
+    if not_modified is CURRENT:
+        return Response(status_code=304, headers=headers)
+    entry = CATALOGUE_CACHE.get(cache_key)
+    if entry is None:
+        entry = _store(cache_key, schema, await load())
+    return _respond(headers, entry, not_modified)
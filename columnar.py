@@ -0,0 +1,170 @@
+# columnar.py
+# ───────────────────────────────────────
+# Columnar exports (compressed NumPy .npz, Arrow IPC stream, Parquet) for the
+# analytics pulls.
+#
+# Rows are read off a Core cursor in chunks and turned straight into column
+# arrays; no ORM objects or per-row dicts are built. Exports can be
+# incremental: every export is bounded by a rowid watermark, which is
+# returned to the caller and passed back as `since` next time to get only
+# the rows inserted after it. Updates to rows that were already exported are
+# not picked up, and since these tables use SQLite's implicit rowid, a
+# rowid freed by deleting the newest row can be reused.
+import importlib
+import io
+import tempfile
+from datetime import date, datetime
+from fastapi import HTTPException
+from sqlalchemy import func, literal_column, select
+import database
+from pagination import EXPORT_CHUNK_SIZE
+
+FORMATS = {
+    "npz": "application/octet-stream",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+WATERMARK_HEADER = "X-Export-Watermark"
+
+_ROWID = literal_column("rowid")
+
+
+def watermark(model, since: int = 0):
+    """Highest rowid in `model`'s table, or `since` if nothing newer exists."""
+    db = database.SessionLocal()
+    try:
+        latest = db.execute(select(func.max(_ROWID)).select_from(model.__table__)).scalar()
+    finally:
+        db.close()
+    return max(latest or 0, since)
+
+
+def _chunks(model, columns: list, since: int, until: int, chunk_size: int):
+    # yields one list of value tuples per chunk, rowid order
+    stmt = (
+        select(*columns)
+        .where(_ROWID > since, _ROWID <= until)
+        .order_by(_ROWID)
+        .execution_options(yield_per=chunk_size)
+    )
+    db = database.SessionLocal()
+    try:
+        for chunk in db.execute(stmt).partitions():
+            yield chunk
+    finally:
+        db.close()
+
+
+def _numpy_column(np, column, values: tuple):
+    # returns (array, null mask or None); NumPy has no nulls of its own
+    kind = column.type.python_type
+    nulls = [v is None for v in values]
+    mask = np.array(nulls, dtype=bool) if any(nulls) else None
+    if kind is datetime:
+        return np.array(values, dtype="datetime64[us]"), mask
+    if kind is date:
+        return np.array(values, dtype="datetime64[D]"), mask
+    if kind is float:
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64), mask
+    if kind is bool:
+        return np.array([bool(v) for v in values], dtype=bool), mask
+    if kind is int:
+        return np.array([0 if v is None else v for v in values], dtype=np.int64), mask
+    return np.array(["" if v is None else str(v) for v in values], dtype=str), mask
+
+
+def _npz(np, model, columns, since, until, chunk_size):
+    parts = {c.key: [] for c in columns}
+    masks = {c.key: [] for c in columns}
+    for chunk in _chunks(model, columns, since, until, chunk_size):
+        for column, values in zip(columns, zip(*chunk)):
+            array, mask = _numpy_column(np, column, values)
+            parts[column.key].append(array)
+            masks[column.key].append(mask if mask is not None else np.zeros(len(array), dtype=bool))
+
+    arrays = {}
+    for column in columns:
+        if parts[column.key]:
+            arrays[column.key] = np.concatenate(parts[column.key])
+            mask = np.concatenate(masks[column.key])
+            if mask.any():
+                arrays[f"{column.key}__isnull"] = mask
+        else:
+            arrays[column.key] = _numpy_column(np, column, ())[0]
+
+    # the zip directory is written last, so build the archive off to the
+    # side and stream it out once it is complete
+    with tempfile.SpooledTemporaryFile(max_size=32 * 1024 * 1024) as buffer:
+        np.savez_compressed(buffer, **arrays)
+        buffer.seek(0)
+        while block := buffer.read(1024 * 1024):
+            yield block
+
+
+def _arrow_schema(pa, columns):
+    types = {int: pa.int64(), float: pa.float64(), bool: pa.bool_(),
+             datetime: pa.timestamp("us"), date: pa.date32()}
+    return pa.schema([pa.field(c.key, types.get(c.type.python_type, pa.string())) for c in columns])
+
+
+class _Sink(io.RawIOBase):
+    # write-only buffer that is emptied as it is streamed; tell() keeps
+    # counting from the start so Parquet footer offsets stay right
+    def __init__(self):
+        self._parts, self._written = [], 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._written += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._written
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _arrow(pa, model, columns, since, until, chunk_size, fmt):
+    schema = _arrow_schema(pa, columns)
+    sink = _Sink()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    # each chunk becomes one record batch / row group and is sent on at once
+    for chunk in _chunks(model, columns, since, until, chunk_size):
+        batch = pa.record_batch(
+            [pa.array(values, type=field.type) for field, values in zip(schema, zip(*chunk))],
+            schema=schema,
+        )
+        writer.write_batch(batch)
+        if data := sink.drain():
+            yield data
+    writer.close()
+    if data := sink.drain():
+        yield data
+
+
+def export(model, fmt: str, since: int = 0, until: int | None = None,
+           exclude: tuple = (), chunk_size: int = EXPORT_CHUNK_SIZE):
+    """Yield `model`'s rows with since < rowid <= until as `fmt` bytes."""
+    # numpy and pyarrow are optional; fail before any bytes are sent
+    package = "numpy" if fmt == "npz" else "pyarrow"
+    try:
+        module = importlib.import_module(package)
+    except ImportError:
+        raise HTTPException(status_code=501, detail=f"{fmt} export needs {package} installed")
+
+    columns = [c for c in model.__table__.columns if c.key not in exclude]
+    until = watermark(model, since) if until is None else until
+    if fmt == "npz":
+        return _npz(module, model, columns, since, until, chunk_size)
+    return _arrow(module, model, columns, since, until, chunk_size, fmt)
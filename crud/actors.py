@@ -1,16 +1,19 @@
 from sqlalchemy.orm import Session
 from models import Actor
+from pagination import keyset, DEFAULT_PAGE_SIZE
+import catalogue
 from schemas import ActorCreate
 
 def create_actor(db: Session, actor: ActorCreate):
     db_actor = Actor(**actor.dict())
     db.add(db_actor)
     db.commit()
+    catalogue.invalidate("actors")
     db.refresh(db_actor)
     return db_actor
 
-def get_actors(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Actor).offset(skip).limit(limit).all()
+def get_actors(db: Session, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    return keyset(db.query(Actor), [Actor.ActorId], cursor, limit)
 
 def get_actor(db: Session, actor_id: int):
     return db.query(Actor).filter(Actor.ActorId == actor_id).first()
@@ -20,6 +23,7 @@ def delete_actor(db: Session, actor_id: int):
     if actor:
         db.delete(actor)
         db.commit()
+        catalogue.invalidate("actors")
     return actor
 
 def update_actor(db: Session, actor_id: int, updated: ActorCreate):
@@ -28,5 +32,6 @@ def update_actor(db: Session, actor_id: int, updated: ActorCreate):
         for key, value in updated.dict().items():
             setattr(actor, key, value)
         db.commit()
+        catalogue.invalidate("actors")
         db.refresh(actor)
     return actor
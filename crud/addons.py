@@ -2,10 +2,12 @@ from sqlalchemy.orm import Session
 from models import BookingAddon
 from schemas import BookingAddonCreate, BookingAddonUpdate
 from fastapi import HTTPException
+from crud import sales
 
 def create_addon(db: Session, addon: BookingAddonCreate):
     db_addon = BookingAddon(**addon.dict())
     db.add(db_addon)
+    sales.bump_for_ticket(db, addon.TicketNo, **sales.addon_counts(db_addon))
     db.commit()
     db.refresh(db_addon)
     return db_addon
@@ -18,8 +20,11 @@ def update_addon(ticket_no: str, update_data: BookingAddonUpdate, db: Session):
     if not addon:
         raise HTTPException(status_code=404, detail="Addon not found")
 
+    before = sales.addon_counts(addon)
     for key, value in update_data.dict(exclude_unset=True).items():
         setattr(addon, key, value)
+    after = sales.addon_counts(addon)
+    sales.bump_for_ticket(db, ticket_no, **{k: after[k] - before[k] for k in after})
 
     db.commit()
     db.refresh(addon)
@@ -31,5 +36,6 @@ def delete_addon(ticket_no: str, db: Session):
         raise HTTPException(status_code=404, detail="Addon not found")
 
     db.delete(addon)
+    sales.bump_for_ticket(db, ticket_no, **{k: -v for k, v in sales.addon_counts(addon).items()})
     db.commit()
     return {"detail": "Addon deleted successfully"}
\ No newline at end of file
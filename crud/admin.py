@@ -1,12 +1,20 @@
 # app/crud/admin.py
+from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
 from models import User, Play, ShowTime, Customer, Actor, Director, Ticket
 from datetime import datetime
+from pagination import keyset, DEFAULT_PAGE_SIZE
+import seatmap
+from crud import sales, cascade
+import catalogue
+from auth_utils import invalidate_user
 
 # Users
 
-def get_all_users(db: Session):
-    return db.query(User).all()
+def get_all_users(db: Session, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    return keyset(db.query(User), [User.id], cursor, limit)
 
 def get_user(db: Session, user_id: int):
     return db.query(User).filter(User.id == user_id).first()
@@ -17,6 +25,7 @@ def promote_user_to_admin(user_id: int, db: Session):
         user.role = "admin"
         db.commit()
         db.refresh(user)
+        invalidate_user(user.username)
     return user
 
 def delete_user(user_id: int, db: Session):
@@ -24,12 +33,13 @@ def delete_user(user_id: int, db: Session):
     if user:
         db.delete(user)
         db.commit()
+        invalidate_user(user.username)
     return user
 
 # Plays
 
-def get_all_plays(db: Session):
-    return db.query(Play).all()
+def get_all_plays(db: Session, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    return keyset(db.query(Play), [Play.PlayId], cursor, limit)
 
 def get_play(db: Session, play_id: int):
     return db.query(Play).filter(Play.PlayId == play_id).first()
@@ -40,20 +50,22 @@ def update_play(db: Session, play_id: int, data: dict):
         for key, value in data.items():
             setattr(play, key, value)
         db.commit()
+        catalogue.invalidate("plays")
         db.refresh(play)
     return play
 
 def delete_play(play_id: int, db: Session):
     play = get_play(db, play_id)
     if play:
-        db.delete(play)
-        db.commit()
+        # keep the loaded play to return once its rows are gone
+        db.expunge(play)
+        cascade.delete_tree(db, Play, Play.PlayId == play_id)
     return play
 
 # ShowTimes
 
-def get_all_showtimes(db: Session):
-    return db.query(ShowTime).all()
+def get_all_showtimes(db: Session, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    return keyset(db.query(ShowTime), [ShowTime.DateAndTime, ShowTime.Play_PlayId], cursor, limit)
 
 def get_showtime(db: Session, play_id: int, date_time: str):
     dt = datetime.fromisoformat(date_time)
@@ -65,20 +77,24 @@ def update_showtime(db: Session, play_id: int, date_time: str, data: dict):
         for key, value in data.items():
             setattr(showtime, key, value)
         db.commit()
+        catalogue.invalidate("showtimes")
         db.refresh(showtime)
     return showtime
 
 def delete_showtime(play_id: int, date_time: str, db: Session):
     showtime = get_showtime(db, play_id, date_time)
     if showtime:
-        db.delete(showtime)
-        db.commit()
+        db.expunge(showtime)
+        cascade.delete_tree(db, ShowTime, and_(
+            ShowTime.Play_PlayId == showtime.Play_PlayId,
+            ShowTime.DateAndTime == showtime.DateAndTime,
+        ))
     return showtime
 
 # Customers
 
-def get_all_customers(db: Session):
-    return db.query(Customer).all()
+def get_all_customers(db: Session, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    return keyset(db.query(Customer), [Customer.CustomerId], cursor, limit)
 
 def get_customer(db: Session, customer_id: int):
     return db.query(Customer).filter(Customer.CustomerId == customer_id).first()
@@ -101,8 +117,8 @@ def delete_customer(customer_id: int, db: Session):
 
 # Actors
 
-def get_all_actors(db: Session):
-    return db.query(Actor).all()
+def get_all_actors(db: Session, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    return keyset(db.query(Actor), [Actor.ActorId], cursor, limit)
 
 def get_actor(db: Session, actor_id: int):
     return db.query(Actor).filter(Actor.ActorId == actor_id).first()
@@ -113,6 +129,7 @@ def update_actor(db: Session, actor_id: int, data: dict):
         for key, value in data.items():
             setattr(actor, key, value)
         db.commit()
+        catalogue.invalidate("actors")
         db.refresh(actor)
     return actor
 
@@ -121,12 +138,13 @@ def delete_actor(actor_id: int, db: Session):
     if actor:
         db.delete(actor)
         db.commit()
+        catalogue.invalidate("actors")
     return actor
 
 # Directors
 
-def get_all_directors(db: Session):
-    return db.query(Director).all()
+def get_all_directors(db: Session, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    return keyset(db.query(Director), [Director.DirectorId], cursor, limit)
 
 def get_director(db: Session, director_id: int):
     return db.query(Director).filter(Director.DirectorId == director_id).first()
@@ -137,6 +155,7 @@ def update_director(db: Session, director_id: int, data: dict):
         for key, value in data.items():
             setattr(director, key, value)
         db.commit()
+        catalogue.invalidate("directors")
         db.refresh(director)
     return director
 
@@ -145,12 +164,13 @@ def delete_director(director_id: int, db: Session):
     if director:
         db.delete(director)
         db.commit()
+        catalogue.invalidate("directors")
     return director
 
 # Tickets
 
-def get_all_tickets(db: Session):
-    return db.query(Ticket).all()
+def get_all_tickets(db: Session, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    return keyset(db.query(Ticket), [Ticket.TicketNo], cursor, limit)
 
 def get_ticket(db: Session, ticket_no: str):
     return db.query(Ticket).filter(Ticket.TicketNo == ticket_no).first()
@@ -158,15 +178,28 @@ def get_ticket(db: Session, ticket_no: str):
 def update_ticket(db: Session, ticket_no: str, data: dict):
     ticket = get_ticket(db, ticket_no)
     if ticket:
+        old_showtime = (ticket.ShowTime_Play_PlayId, ticket.ShowTime_DateAndTime)
         for key, value in data.items():
             setattr(ticket, key, value)
+        try:
+            db.flush()
+        except IntegrityError as exc:
+            db.rollback()
+            # the unique seat index rejects a move onto a sold seat
+            if "Seat_SeatNo" in str(exc.orig):
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Seat already sold.")
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ticket number already exists.")
+        sales.rebuild(db, [old_showtime, (ticket.ShowTime_Play_PlayId, ticket.ShowTime_DateAndTime)])
         db.commit()
         db.refresh(ticket)
+        # the seat may have moved; let both seat maps reload from the index
+        seatmap.invalidate(*old_showtime)
+        seatmap.invalidate(ticket.ShowTime_Play_PlayId, ticket.ShowTime_DateAndTime)
     return ticket
 
 def delete_ticket(ticket_no: str, db: Session):
     ticket = get_ticket(db, ticket_no)
     if ticket:
-        db.delete(ticket)
-        db.commit()
+        db.expunge(ticket)
+        cascade.delete_tree(db, Ticket, Ticket.TicketNo == ticket_no)
     return ticket
@@ -0,0 +1,76 @@
+# crud/aio.py
+# ───────────────────────────────────────
+# Async variants of the public read paths and the booking writes, for the
+# opt-in AsyncSession mode (USE_ASYNC_DB=1).
+#
+# Reads are native async queries. Writes run the sync crud functions through
+# AsyncSession.run_sync, which keeps a single implementation of the seat map
+# and other write-side bookkeeping while still awaiting the driver I/O.
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from models import Play, Actor, Director, ShowTime
+from schemas import TicketCreate, PaymentCreate
+from pagination import akeyset, DEFAULT_PAGE_SIZE
+from crud import tickets, payments, showtimes
+
+# Plays
+
+async def get_all_plays(db: AsyncSession, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    return await akeyset(db, select(Play), [Play.PlayId], cursor, limit)
+
+async def get_play_by_id(db: AsyncSession, play_id: int):
+    play = await db.get(Play, play_id)
+    if not play:
+        raise HTTPException(status_code=404, detail="Play not found")
+    return play
+
+# Actors
+
+async def get_actors(db: AsyncSession, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    return await akeyset(db, select(Actor), [Actor.ActorId], cursor, limit)
+
+async def get_actor(db: AsyncSession, actor_id: int):
+    return await db.get(Actor, actor_id)
+
+# Directors
+
+async def get_directors(db: AsyncSession, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    return await akeyset(db, select(Director), [Director.DirectorId], cursor, limit)
+
+async def get_director(db: AsyncSession, director_id: int):
+    return await db.get(Director, director_id)
+
+# ShowTimes
+
+async def get_showtimes(db: AsyncSession, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    return await akeyset(db, select(ShowTime), [ShowTime.DateAndTime, ShowTime.Play_PlayId], cursor, limit)
+
+async def get_upcoming_showtimes(
+    db: AsyncSession,
+    now: datetime | None = None,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE
+):
+    now = now or datetime.utcnow()
+    stmt = select(ShowTime).where(ShowTime.DateAndTime >= now)
+    return await akeyset(db, stmt, [ShowTime.DateAndTime, ShowTime.Play_PlayId], cursor, limit)
+
+async def get_showtimes_by_play(db: AsyncSession, play_id: int):
+    stmt = select(ShowTime).where(ShowTime.Play_PlayId == play_id).order_by(ShowTime.DateAndTime)
+    return (await db.scalars(stmt)).all()
+
+async def get_seat_grid(db: AsyncSession, play_id: int, date_time: str):
+    return await db.run_sync(showtimes.get_seat_grid, play_id, date_time)
+
+# Tickets and payments
+
+async def create_ticket(db: AsyncSession, ticket: TicketCreate):
+    return await db.run_sync(tickets.create_ticket, ticket)
+
+async def create_tickets(db: AsyncSession, batch: list[TicketCreate]):
+    return await db.run_sync(tickets.create_tickets, batch)
+
+async def make_payment(db: AsyncSession, payment: PaymentCreate):
+    return await db.run_sync(payments.make_payment, payment)
@@ -1,12 +1,12 @@
 # crud/auth.py
 # ───────────────────────────────────────
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from models import User
 from schemas import UserCreate
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from auth_utils import invalidate_user
+from passwords import hash_password, ahash_password
+from starlette.concurrency import run_in_threadpool
 
 def get_user_by_username(db: Session, username: str):
     return db.query(User).filter(User.username == username).first()
@@ -14,13 +14,15 @@ def get_user_by_username(db: Session, username: str):
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
-def create_user(db: Session, user_in: UserCreate):
+def _check_new_user(db: Session, user_in: UserCreate):
     if get_user_by_username(db, user_in.username):
         raise HTTPException(status_code=400, detail="Username already exists")
     if get_user_by_email(db, user_in.email):
         raise HTTPException(status_code=400, detail="Email already exists")
+    # hand the connection back to the pool while bcrypt runs
+    db.rollback()
 
-    hashed = pwd_context.hash(user_in.password)
+def _insert_user(db: Session, user_in: UserCreate, hashed: str):
     db_user = User(
         username=user_in.username,
         email=user_in.email,
@@ -30,4 +32,15 @@ def create_user(db: Session, user_in: UserCreate):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    invalidate_user(db_user.username)
     return db_user
+
+def create_user(db: Session, user_in: UserCreate):
+    _check_new_user(db, user_in)
+    return _insert_user(db, user_in, hash_password(user_in.password))
+
+async def acreate_user(db: Session, user_in: UserCreate):
+    """create_user() for async routes: the hash is awaited, holding no thread or connection."""
+    await run_in_threadpool(_check_new_user, db, user_in)
+    hashed = await ahash_password(user_in.password)
+    return await run_in_threadpool(_insert_user, db, user_in, hashed)
@@ -0,0 +1,196 @@
+# crud/bulk.py
+# ───────────────────────────────────────
+# Set-based admin mutations: one UPDATE or DELETE statement for every row
+# matching an id list and/or a filter, in a single transaction.
+#
+# A filter maps column names to a value (equality), a list (IN) or a dict
+# of comparisons such as {"gte": ..., "lt": ...}. The write-side
+# bookkeeping the one-row paths do (sales counters, seat maps, catalogue
+# versions, the user cache) is done once for the whole set of rows touched.
+from datetime import date, datetime
+from fastapi import HTTPException
+from sqlalchemy import and_, delete, func, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models import User, Play, ShowTime, Customer, Actor, Director, Ticket, Payment, BookingAddon
+import seatmap
+import catalogue
+from crud import sales, cascade
+from auth_utils import invalidate_user
+
+BULK_MODELS = {
+    "users": User,
+    "plays": Play,
+    "showtimes": ShowTime,
+    "customers": Customer,
+    "actors": Actor,
+    "directors": Director,
+    "tickets": Ticket,
+    "payments": Payment,
+    "addons": BookingAddon,
+}
+# columns that can't be set in bulk
+PROTECTED = {"users": {"id", "hashed_password"}}
+# a showtime's tickets follow it when it is moved
+SHOWTIME_TICKET_COLUMNS = {"Play_PlayId": "ShowTime_Play_PlayId", "DateAndTime": "ShowTime_DateAndTime"}
+_OPERATORS = {
+    "eq": lambda c, v: c == v, "ne": lambda c, v: c != v,
+    "lt": lambda c, v: c < v, "lte": lambda c, v: c <= v,
+    "gt": lambda c, v: c > v, "gte": lambda c, v: c >= v,
+}
+
+
+def _model(entity: str):
+    model = BULK_MODELS.get(entity)
+    if model is None:
+        raise HTTPException(status_code=404, detail="Unknown entity")
+    return model
+
+
+def _column(model, name: str):
+    column = model.__table__.columns.get(name)
+    if column is None:
+        raise HTTPException(status_code=400, detail=f"Unknown column {name!r}")
+    return column
+
+
+def _coerce(column, value):
+    # JSON carries dates as strings; the DateTime type wants datetime objects
+    if value is None or isinstance(value, (datetime, date)):
+        return value
+    try:
+        kind = column.type.python_type
+        if kind is datetime:
+            return datetime.fromisoformat(value).replace(tzinfo=None)
+        if kind is date:
+            return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Invalid value for {column.key!r}")
+    return value
+
+
+def _condition(model, ids: list | None, where: dict):
+    clauses = []
+    if ids is not None:
+        pk = list(model.__table__.primary_key.columns)
+        if len(pk) != 1:
+            raise HTTPException(status_code=400, detail="This entity has a composite key; filter with 'where'")
+        clauses.append(pk[0].in_([_coerce(pk[0], v) for v in ids]))
+    for name, spec in where.items():
+        column = _column(model, name)
+        if isinstance(spec, list):
+            clauses.append(column.in_([_coerce(column, v) for v in spec]))
+        elif isinstance(spec, dict):
+            for op, value in spec.items():
+                if op not in _OPERATORS:
+                    raise HTTPException(status_code=400, detail=f"Unknown operator {op!r}")
+                clauses.append(_OPERATORS[op](column, _coerce(column, value)))
+        else:
+            clauses.append(column == _coerce(column, spec))
+    if not clauses:
+        raise HTTPException(status_code=400, detail="Give 'ids' or a 'where' filter")
+    return and_(*clauses)
+
+
+def _showtimes(db: Session, entity: str, model, condition):
+    # the (play_id, date_time) pairs whose tickets, payments or add-ons match
+    if entity == "showtimes":
+        stmt = select(ShowTime.Play_PlayId, ShowTime.DateAndTime).where(condition)
+    elif entity == "tickets":
+        stmt = select(Ticket.ShowTime_Play_PlayId, Ticket.ShowTime_DateAndTime).where(condition)
+    elif entity in ("payments", "addons"):
+        stmt = (
+            select(Ticket.ShowTime_Play_PlayId, Ticket.ShowTime_DateAndTime)
+            .join(model, model.TicketNo == Ticket.TicketNo)
+            .where(condition)
+        )
+    else:
+        return set()
+    return {tuple(row) for row in db.execute(stmt.distinct())}
+
+
+def _after_commit(entity: str, usernames: set, showtimes: set):
+    if entity in ("plays", "actors", "directors", "showtimes"):
+        catalogue.invalidate(entity)
+    for username in usernames:
+        invalidate_user(username)
+    for play_id, date_time in showtimes:
+        seatmap.invalidate(play_id, date_time)
+
+
+def _execute(db: Session, stmt):
+    try:
+        result = db.execute(stmt, execution_options={"synchronize_session": False})
+    except IntegrityError as exc:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=f"Bulk change conflicts with existing rows: {exc.orig}")
+    return result.rowcount
+
+
+def count(db: Session, entity: str, ids: list | None = None, where: dict | None = None):
+    model = _model(entity)
+    condition = _condition(model, ids, where or {})
+    return db.execute(select(func.count()).select_from(model).where(condition)).scalar()
+
+
+def bulk_update(db: Session, entity: str, values: dict, ids: list | None = None,
+                where: dict | None = None, dry_run: bool = False):
+    model = _model(entity)
+    condition = _condition(model, ids, where or {})
+    if not values:
+        raise HTTPException(status_code=400, detail="Nothing to update")
+    protected = PROTECTED.get(entity, set())
+    values = {name: _coerce(_column(model, name), value) for name, value in values.items()}
+    if protected & values.keys():
+        raise HTTPException(status_code=400, detail=f"Can't bulk update {sorted(protected & values.keys())}")
+    if dry_run:
+        return {"entity": entity, "matched": count(db, entity, ids, where), "dry_run": True}
+
+    usernames = set()
+    if entity == "users":
+        usernames = set(db.scalars(select(User.username).where(condition)))
+        if "username" in values:
+            usernames.add(values["username"])
+    showtimes = _showtimes(db, entity, model, condition)
+    # where the affected showtimes end up if the change moves them
+    moved = set()
+    if entity in ("showtimes", "tickets"):
+        play_col, time_col = SHOWTIME_TICKET_COLUMNS.keys() if entity == "showtimes" else SHOWTIME_TICKET_COLUMNS.values()
+        if play_col in values or time_col in values:
+            moved = {(values.get(play_col, p), values.get(time_col, t)) for p, t in showtimes}
+    elif entity in ("payments", "addons") and "TicketNo" in values:
+        # re-pointed rows count towards the target ticket's showtime
+        moved = _showtimes(db, "tickets", Ticket, Ticket.TicketNo == values["TicketNo"])
+
+    matched = _execute(db, update(model).where(condition).values(**values))
+    if entity == "showtimes" and moved and showtimes:
+        ticket_values = {SHOWTIME_TICKET_COLUMNS[k]: v for k, v in values.items() if k in SHOWTIME_TICKET_COLUMNS}
+        keys = tuple_(Ticket.ShowTime_Play_PlayId, Ticket.ShowTime_DateAndTime)
+        _execute(db, update(Ticket).where(keys.in_(showtimes)).values(**ticket_values))
+    if moved or (showtimes and entity != "showtimes"):
+        sales.rebuild(db, list(showtimes | moved))
+    db.commit()
+    _after_commit(entity, usernames, showtimes | moved)
+    return {"entity": entity, "matched": matched, "dry_run": False}
+
+
+def bulk_delete(db: Session, entity: str, ids: list | None = None,
+                where: dict | None = None, dry_run: bool = False):
+    model = _model(entity)
+    condition = _condition(model, ids, where or {})
+    if dry_run:
+        return {"entity": entity, "matched": count(db, entity, ids, where), "dry_run": True}
+
+    if model in cascade.CASCADES:
+        # plays, showtimes and tickets take their dependent rows with them
+        counts = cascade.delete_tree(db, model, condition)
+        return {"entity": entity, "matched": counts[model.__tablename__], "dry_run": False, "cascaded": counts}
+
+    usernames = set(db.scalars(select(User.username).where(condition))) if entity == "users" else set()
+    showtimes = _showtimes(db, entity, model, condition)
+    matched = _execute(db, delete(model).where(condition))
+    if showtimes and entity != "showtimes":
+        sales.rebuild(db, list(showtimes))
+    db.commit()
+    _after_commit(entity, usernames, showtimes)
+    return {"entity": entity, "matched": matched, "dry_run": False}
@@ -0,0 +1,82 @@
+# crud/cascade.py
+# ───────────────────────────────────────
+# Cascade-aware deletes.
+#
+# CASCADES declares which rows hang off which: a play owns its actors,
+# directors and showtimes, a showtime owns its tickets, and a ticket owns its
+# payment and add-ons. delete_tree() removes a whole subtree with one DELETE
+# per table, children first, each selecting its rows through a subquery on
+# its parent, all in one transaction. The sales rollups of every showtime
+# touched are recounted in the same transaction.
+#
+# The rules live here rather than as ON DELETE CASCADE because SQLite only
+# honours those with foreign key enforcement on, and existing databases were
+# created without them.
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.orm import Session
+from models import Play, Actor, Director, ShowTime, Ticket, Payment, BookingAddon
+import seatmap
+import catalogue
+from crud import sales
+
+# parent -> [(child, child columns, matching parent columns)]
+CASCADES = {
+    Play: [
+        (Actor, [Actor.Play_PlayId], [Play.PlayId]),
+        (Director, [Director.Play_PlayId], [Play.PlayId]),
+        (ShowTime, [ShowTime.Play_PlayId], [Play.PlayId]),
+    ],
+    ShowTime: [
+        (Ticket, [Ticket.ShowTime_Play_PlayId, Ticket.ShowTime_DateAndTime],
+         [ShowTime.Play_PlayId, ShowTime.DateAndTime]),
+    ],
+    Ticket: [
+        (Payment, [Payment.TicketNo], [Ticket.TicketNo]),
+        (BookingAddon, [BookingAddon.TicketNo], [Ticket.TicketNo]),
+    ],
+}
+# how each table names the showtime its rows belong to
+SHOWTIME_KEYS = {
+    ShowTime: (ShowTime.Play_PlayId, ShowTime.DateAndTime),
+    Ticket: (Ticket.ShowTime_Play_PlayId, Ticket.ShowTime_DateAndTime),
+}
+CATALOGUE = {Play: "plays", Actor: "actors", Director: "directors", ShowTime: "showtimes"}
+
+
+def _delete(db: Session, model, condition, counts: dict, showtimes: set):
+    for child, child_cols, parent_cols in CASCADES.get(model, []):
+        parents = select(*parent_cols).where(condition)
+        if len(child_cols) == 1:
+            child_condition = child_cols[0].in_(parents)
+        else:
+            child_condition = tuple_(*child_cols).in_(parents)
+        _delete(db, child, child_condition, counts, showtimes)
+
+    if model in SHOWTIME_KEYS:
+        keys = select(*SHOWTIME_KEYS[model]).where(condition).distinct()
+        showtimes.update(tuple(row) for row in db.execute(keys))
+    result = db.execute(delete(model).where(condition), execution_options={"synchronize_session": False})
+    counts[model.__tablename__] = counts.get(model.__tablename__, 0) + result.rowcount
+
+
+def delete_tree(db: Session, model, condition):
+    """Delete the `model` rows matching `condition` and everything under them.
+
+    Commits, then refreshes the seat maps and catalogue versions affected.
+    Returns the number of rows deleted per table.
+    """
+    counts: dict[str, int] = {}
+    showtimes: set = set()
+    # let the ORM write out anything pending before rows go from under it
+    db.flush()
+    _delete(db, model, condition, counts, showtimes)
+    if showtimes:
+        sales.rebuild(db, list(showtimes))
+    db.commit()
+
+    for play_id, date_time in showtimes:
+        seatmap.invalidate(play_id, date_time)
+    touched = [name for table, name in CATALOGUE.items() if counts.get(table.__tablename__)]
+    if touched:
+        catalogue.invalidate(*touched)
+    return counts
@@ -1,7 +1,15 @@
+import re
+from fastapi import HTTPException
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from models import Customer
+from models import Customer, Ticket, Play, Payment, BookingAddon, phone_digits
+from pagination import keyset, DEFAULT_PAGE_SIZE
 from schemas import CustomerCreate
 
+MAX_SEARCH_RESULTS = 50
+# SQLite's lower() only folds ASCII, so fold the query the same way
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
 def create_customer(db: Session, customer: CustomerCreate):
     db_customer = Customer(**customer.dict())
     db.add(db_customer)
@@ -9,12 +17,34 @@ def create_customer(db: Session, customer: CustomerCreate):
     db.refresh(db_customer)
     return db_customer
 
-def get_customers(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Customer).offset(skip).limit(limit).all()
+def get_customers(db: Session, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    return keyset(db.query(Customer), [Customer.CustomerId], cursor, limit)
 
 def get_customer(db: Session, customer_id: int):
     return db.query(Customer).filter(Customer.CustomerId == customer_id).first()
 
+def get_customer_tickets(db: Session, customer_id: int, cursor: str | None = None,
+                         limit: int = DEFAULT_PAGE_SIZE):
+    """A customer's tickets in showtime order, one query per page."""
+    if get_customer(db, customer_id) is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    # ticket columns all come from ix_tickets_customer_datetime; payment
+    # and add-ons are one row per ticket at most
+    query = (
+        db.query(
+            Ticket.TicketNo, Ticket.Seat_RowNo, Ticket.Seat_SeatNo,
+            Ticket.ShowTime_DateAndTime, Ticket.ShowTime_Play_PlayId,
+            Play.Title,
+            Payment.status.label("payment_status"), Payment.amount, Payment.payment_method,
+            BookingAddon.food, BookingAddon.drinks, BookingAddon.flowers,
+        )
+        .outerjoin(Play, Play.PlayId == Ticket.ShowTime_Play_PlayId)
+        .outerjoin(Payment, Payment.TicketNo == Ticket.TicketNo)
+        .outerjoin(BookingAddon, BookingAddon.TicketNo == Ticket.TicketNo)
+        .filter(Ticket.Customer_CustomerId == customer_id)
+    )
+    return keyset(query, [Ticket.ShowTime_DateAndTime, Ticket.TicketNo], cursor, limit)
+
 def delete_customer(db: Session, customer_id: int):
     customer = db.query(Customer).filter(Customer.CustomerId == customer_id).first()
     if customer:
@@ -30,3 +60,25 @@ def update_customer(db: Session, customer_id: int, updated: CustomerCreate):
         db.commit()
         db.refresh(customer)
     return customer
+
+def _prefix(expression, prefix: str):
+    # a range rather than LIKE, so SQLite can seek the expression index
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return (expression >= prefix) & (expression < upper)
+
+def search_customers(db: Session, q: str, limit: int = 20):
+    """Typeahead lookup: by phone number if `q` is all digits and punctuation, else by name prefix."""
+    q = q.strip()
+    if q and not re.search(r"[^\d\s\-+()./]", q):
+        expression, prefix = phone_digits(Customer.TelephoneNo), re.sub(r"\D", "", q)
+    else:
+        expression, prefix = func.lower(Customer.Name), q.translate(_ASCII_LOWER)
+    if not prefix:
+        raise HTTPException(status_code=400, detail="Search query is empty")
+    return (
+        db.query(Customer)
+        .filter(_prefix(expression, prefix))
+        .order_by(expression, Customer.CustomerId)
+        .limit(limit)
+        .all()
+    )
@@ -1,16 +1,19 @@
 from sqlalchemy.orm import Session
 from models import Director
+from pagination import keyset, DEFAULT_PAGE_SIZE
+import catalogue
 from schemas import DirectorCreate
 
 def create_director(db: Session, director: DirectorCreate):
     db_director = Director(**director.dict())
     db.add(db_director)
     db.commit()
+    catalogue.invalidate("directors")
     db.refresh(db_director)
     return db_director
 
-def get_directors(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Director).offset(skip).limit(limit).all()
+def get_directors(db: Session, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    return keyset(db.query(Director), [Director.DirectorId], cursor, limit)
 
 def get_director(db: Session, director_id: int):
     return db.query(Director).filter(Director.DirectorId == director_id).first()
@@ -20,6 +23,7 @@ def delete_director(db: Session, director_id: int):
     if director:
         db.delete(director)
         db.commit()
+        catalogue.invalidate("directors")
     return director
 
 def update_director(db: Session, director_id: int, updated: DirectorCreate):
@@ -28,5 +32,6 @@ def update_director(db: Session, director_id: int, updated: DirectorCreate):
         for key, value in updated.dict().items():
             setattr(director, key, value)
         db.commit()
+        catalogue.invalidate("directors")
         db.refresh(director)
     return director
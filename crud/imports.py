@@ -0,0 +1,154 @@
+# crud/imports.py
+# ───────────────────────────────────────
+# Bulk import of catalogue and customer rows from CSV or NDJSON.
+#
+# Rows are validated one by one against the Create schemas, then inserted
+# with a single executemany per chunk and committed chunk by chunk, so a bad
+# row costs an error entry rather than the whole file. Actors, directors and
+# showtimes may name their play by `PlayTitle` instead of `Play_PlayId`;
+# titles and ids are looked up once per import and resolved in memory.
+import csv
+import json
+from datetime import datetime
+from typing import Callable, Iterable, TextIO
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models import Play, Actor, Director, ShowTime, Customer
+from schemas import PlayCreate, ActorCreate, DirectorCreate, ShowTimeCreate, CustomerCreate
+import catalogue
+
+IMPORTS = {
+    "plays": (Play, PlayCreate),
+    "actors": (Actor, ActorCreate),
+    "directors": (Director, DirectorCreate),
+    "showtimes": (ShowTime, ShowTimeCreate),
+    "customers": (Customer, CustomerCreate),
+}
+CATALOGUE_ENTITIES = {"plays", "actors", "directors", "showtimes"}
+IMPORT_CHUNK_SIZE = 1000
+PLAY_TITLE_FIELD = "PlayTitle"
+
+
+def read_rows(stream: TextIO, fmt: str):
+    """Yield (line_no, row, error) for each record of a CSV or NDJSON stream."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_no, line.rstrip("\n"), f"invalid JSON: {exc}"
+            continue
+        if isinstance(row, dict):
+            yield line_no, row, None
+        else:
+            yield line_no, row, "expected a JSON object"
+
+
+class _Plays:
+    # in-memory play lookup for resolving foreign keys
+    def __init__(self, db: Session):
+        self.ids = set()
+        self.titles = {}
+        for play_id, title in db.query(Play.PlayId, Play.Title):
+            self.ids.add(play_id)
+            # a title shared by several plays can't be resolved
+            self.titles[title] = None if title in self.titles else play_id
+
+    def resolve(self, row: dict):
+        title = row.pop(PLAY_TITLE_FIELD, None)
+        if row.get("Play_PlayId") is None and title is not None:
+            if title not in self.titles:
+                return f"unknown play title {title!r}"
+            if self.titles[title] is None:
+                return f"play title {title!r} is ambiguous; use Play_PlayId"
+            row["Play_PlayId"] = self.titles[title]
+        return None
+
+
+def _validate(schema: type[BaseModel], raw, plays: _Plays | None):
+    # returns (values, error)
+    row = {k: (None if v == "" else v) for k, v in raw.items()}
+    if plays is not None:
+        error = plays.resolve(row)
+        if error:
+            return None, error
+    try:
+        values = schema.model_validate(row).model_dump()
+    except ValidationError as exc:
+        return None, "; ".join(
+            f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in exc.errors()
+        )
+    if plays is not None and values["Play_PlayId"] not in plays.ids:
+        return None, f"play {values['Play_PlayId']} does not exist"
+    for key, value in values.items():
+        if isinstance(value, datetime):
+            values[key] = value.replace(tzinfo=None)
+    return values, None
+
+
+def _flush(db: Session, model, batch: list, on_error: Callable, report: dict):
+    try:
+        db.execute(insert(model), [values for _, values, _ in batch])
+        db.commit()
+        report["inserted"] += len(batch)
+        return
+    except IntegrityError:
+        db.rollback()
+    # something in the chunk clashes with existing rows; retry row by row
+    # to find out which
+    for line_no, values, raw in batch:
+        try:
+            db.execute(insert(model), [values])
+            db.commit()
+            report["inserted"] += 1
+        except IntegrityError as exc:
+            db.rollback()
+            on_error(line_no, raw, f"conflicts with an existing row: {exc.orig}")
+
+
+def import_rows(
+    db: Session,
+    entity: str,
+    rows: Iterable[tuple],
+    on_error: Callable[[int, object, str], None],
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+):
+    """Validate and insert `rows` from read_rows() into `entity`'s table.
+
+    Each rejected row is passed to `on_error(line_no, row, message)`.
+    Returns counts of rows read, inserted and failed.
+    """
+    model, schema = IMPORTS[entity]
+    plays = _Plays(db) if "Play_PlayId" in schema.model_fields else None
+    report = {"entity": entity, "total": 0, "inserted": 0, "failed": 0}
+
+    def reject(line_no, raw, message):
+        report["failed"] += 1
+        on_error(line_no, raw, message)
+
+    batch = []
+    for line_no, raw, error in rows:
+        report["total"] += 1
+        if error is None:
+            values, error = _validate(schema, raw, plays)
+        if error:
+            reject(line_no, raw, error)
+            continue
+        batch.append((line_no, values, raw))
+        if len(batch) >= chunk_size:
+            _flush(db, model, batch, reject, report)
+            batch = []
+    if batch:
+        _flush(db, model, batch, reject, report)
+
+    if report["inserted"] and entity in CATALOGUE_ENTITIES:
+        catalogue.invalidate(entity)
+    return report
@@ -3,6 +3,8 @@ from models import Payment
 from schemas import PaymentCreate
 import uuid
 from fastapi import HTTPException
+from pagination import keyset, DEFAULT_PAGE_SIZE
+from crud import sales
 
 def make_payment(db: Session, payment: PaymentCreate):
     existing = db.query(Payment).filter(Payment.TicketNo == payment.TicketNo).first()
@@ -10,8 +12,9 @@ def make_payment(db: Session, payment: PaymentCreate):
         raise HTTPException(status_code=400, detail="Payment already exists for this ticket.")
 
     receipt = str(uuid.uuid4())[:8]
-    new_payment = Payment(**payment.dict(), status="completed", receipt_no=receipt)
+    new_payment = Payment(**payment.dict(exclude={"status", "receipt_no"}), status="completed", receipt_no=receipt)
     db.add(new_payment)
+    sales.record_payment(db, new_payment)
     db.commit()
     db.refresh(new_payment)
     return new_payment
@@ -19,13 +22,14 @@ def make_payment(db: Session, payment: PaymentCreate):
 def get_payment_by_ticket(db: Session, ticket_no: str):
     return db.query(Payment).filter(Payment.TicketNo == ticket_no).first()
 
-def get_all_payments(db: Session):
-    return db.query(Payment).all()
+def get_all_payments(db: Session, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    return keyset(db.query(Payment), [Payment.TicketNo], cursor, limit)
 
 def delete_payment(ticket_no: str, db: Session):
     payment = db.query(Payment).filter(Payment.TicketNo == ticket_no).first()
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
     db.delete(payment)
+    sales.record_payment(db, payment, sign=-1)
     db.commit()
     return {"detail": "Payment deleted successfully"}
\ No newline at end of file
@@ -1,12 +1,17 @@
-from sqlalchemy.orm import Session
-from models import Play
+from datetime import datetime
+from sqlalchemy.orm import Session, selectinload
+from models import Play, ShowTime
 from schemas import PlayCreate, PlayUpdate
 from fastapi import HTTPException
+from pagination import keyset, DEFAULT_PAGE_SIZE
+import catalogue
+from crud import cascade
 
 def create_play(db: Session, play: PlayCreate):
     db_play = Play(**play.dict())
     db.add(db_play)
     db.commit()
+    catalogue.invalidate("plays")
     db.refresh(db_play)
     return db_play
 
@@ -16,8 +21,31 @@ def get_play_by_id(db: Session, play_id: int):
         raise HTTPException(status_code=404, detail="Play not found")
     return play
 
-def get_all_plays(db: Session):
-    return db.query(Play).all()
+def get_all_plays(db: Session, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    return keyset(db.query(Play), [Play.PlayId], cursor, limit)
+
+MAX_FULL_PLAYS = 100
+
+def get_plays_full(db: Session, play_ids: list[int], now: datetime | None = None):
+    # One query for the plays plus one per relationship, however many plays
+    now = now or datetime.utcnow()
+    return (
+        db.query(Play)
+        .options(
+            selectinload(Play.actors),
+            selectinload(Play.directors),
+            selectinload(Play.showtimes.and_(ShowTime.DateAndTime >= now)),
+        )
+        .filter(Play.PlayId.in_(play_ids))
+        .order_by(Play.PlayId)
+        .all()
+    )
+
+def get_play_full(db: Session, play_id: int, now: datetime | None = None):
+    found = get_plays_full(db, [play_id], now)
+    if not found:
+        raise HTTPException(status_code=404, detail="Play not found")
+    return found[0]
 
 def update_play(play_id: int, update_data: PlayUpdate, db: Session):
     play = db.query(Play).filter(Play.PlayId == play_id).first()
@@ -28,6 +56,7 @@ def update_play(play_id: int, update_data: PlayUpdate, db: Session):
         setattr(play, key, value)
 
     db.commit()
+    catalogue.invalidate("plays")
     db.refresh(play)
     return play
 
@@ -35,6 +64,6 @@ def delete_play(play_id: int, db: Session):
     play = db.query(Play).filter(Play.PlayId == play_id).first()
     if not play:
         raise HTTPException(status_code=404, detail="Play not found")
-    db.delete(play)
-    db.commit()
+    # actors, directors, showtimes and their tickets go with it
+    cascade.delete_tree(db, Play, Play.PlayId == play_id)
     return {"detail": "Play deleted successfully"}
\ No newline at end of file
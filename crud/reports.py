@@ -0,0 +1,109 @@
+# crud/reports.py
+# ───────────────────────────────────────
+# Sales reports, read from the rollups in crud/sales.py rather than the raw
+# tickets and payments tables. Revenue comes from daily_sales; occupancy and
+# add-on uptake come from showtime_sales. Either way a season-long report
+# reads one row per day or per showtime.
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+from models import DailySales, ShowTimeSales, ShowTime, Play
+import seatmap
+
+
+def _days(query, column, start: date | None, end: date | None):
+    if start:
+        query = query.filter(column >= start)
+    if end:
+        query = query.filter(column <= end)
+    return query
+
+
+def _showtime_window(query, column, start: date | None, end: date | None):
+    # date bounds are inclusive; showtime columns hold datetimes
+    if start:
+        query = query.filter(column >= datetime.combine(start, time.min))
+    if end:
+        query = query.filter(column < datetime.combine(end + timedelta(days=1), time.min))
+    return query
+
+
+def _revenue(db: Session, group_cols: list, start, end, play_id):
+    query = db.query(
+        *group_cols,
+        func.sum(DailySales.tickets_paid).label("tickets_paid"),
+        func.sum(DailySales.gross_revenue).label("gross_revenue"),
+    )
+    query = _days(query, DailySales.day, start, end)
+    if play_id is not None:
+        query = query.filter(DailySales.Play_PlayId == play_id)
+    return query
+
+
+def revenue_by_play(db: Session, start: date | None = None, end: date | None = None):
+    query = _revenue(db, [DailySales.Play_PlayId, Play.Title], start, end, None)
+    rows = (
+        query.outerjoin(Play, Play.PlayId == DailySales.Play_PlayId)
+        .group_by(DailySales.Play_PlayId)
+        .order_by(func.sum(DailySales.gross_revenue).desc())
+        .all()
+    )
+    return [row._asdict() for row in rows]
+
+
+def revenue_by_day(db: Session, start: date | None = None, end: date | None = None, play_id: int | None = None):
+    query = _revenue(db, [DailySales.day], start, end, play_id)
+    rows = query.group_by(DailySales.day).order_by(DailySales.day).all()
+    return [row._asdict() for row in rows]
+
+
+def revenue_by_method(db: Session, start: date | None = None, end: date | None = None, play_id: int | None = None):
+    query = _revenue(db, [DailySales.payment_method], start, end, play_id)
+    rows = (
+        query.group_by(DailySales.payment_method)
+        .order_by(func.sum(DailySales.gross_revenue).desc())
+        .all()
+    )
+    return [row._asdict() for row in rows]
+
+
+def occupancy(db: Session, start: date | None = None, end: date | None = None, play_id: int | None = None):
+    capacity = seatmap.VENUE_ROWS * seatmap.VENUE_SEATS_PER_ROW
+    query = db.query(
+        ShowTime.Play_PlayId,
+        ShowTime.DateAndTime,
+        func.coalesce(ShowTimeSales.seats_sold, 0).label("seats_sold"),
+    ).outerjoin(ShowTimeSales, and_(
+        ShowTimeSales.ShowTime_Play_PlayId == ShowTime.Play_PlayId,
+        ShowTimeSales.ShowTime_DateAndTime == ShowTime.DateAndTime,
+    ))
+    query = _showtime_window(query, ShowTime.DateAndTime, start, end)
+    if play_id is not None:
+        query = query.filter(ShowTime.Play_PlayId == play_id)
+    return [
+        {**row._asdict(), "capacity": capacity, "occupancy": row.seats_sold / capacity if capacity else 0.0}
+        for row in query.order_by(ShowTime.DateAndTime, ShowTime.Play_PlayId).all()
+    ]
+
+
+def addon_uptake(db: Session, start: date | None = None, end: date | None = None, play_id: int | None = None):
+    query = db.query(
+        ShowTimeSales.ShowTime_Play_PlayId.label("Play_PlayId"),
+        Play.Title,
+        func.sum(ShowTimeSales.seats_sold).label("seats_sold"),
+        func.sum(ShowTimeSales.addons_food).label("food"),
+        func.sum(ShowTimeSales.addons_drinks).label("drinks"),
+        func.sum(ShowTimeSales.addons_flowers).label("flowers"),
+    ).outerjoin(Play, Play.PlayId == ShowTimeSales.ShowTime_Play_PlayId)
+    query = _showtime_window(query, ShowTimeSales.ShowTime_DateAndTime, start, end)
+    if play_id is not None:
+        query = query.filter(ShowTimeSales.ShowTime_Play_PlayId == play_id)
+    rows = query.group_by(ShowTimeSales.ShowTime_Play_PlayId).order_by(ShowTimeSales.ShowTime_Play_PlayId).all()
+
+    report = []
+    for row in rows:
+        entry = row._asdict()
+        for name in ("food", "drinks", "flowers"):
+            entry[f"{name}_rate"] = entry[name] / row.seats_sold if row.seats_sold else 0.0
+        report.append(entry)
+    return report
@@ -0,0 +1,173 @@
+# crud/sales.py
+# ───────────────────────────────────────
+# Denormalised sales counters: one row per showtime (showtime_sales) and a
+# daily revenue rollup per play and payment method (daily_sales).
+#
+# The ticket, payment and add-on write paths call these helpers before they
+# commit, so each counter change lands in the same transaction as the row
+# that caused it. rebuild() recomputes the counters from the raw tables.
+from datetime import datetime, timedelta
+from sqlalchemy import and_, case, delete, func, or_, select, tuple_
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from models import ShowTimeSales, DailySales, Ticket, Payment, BookingAddon
+import seatmap
+
+COUNTERS = (
+    "seats_sold", "tickets_paid", "gross_revenue",
+    "addons_food", "addons_drinks", "addons_flowers",
+)
+DAILY_COUNTERS = ("tickets_paid", "gross_revenue")
+# payment_method is part of the rollup key, so it can't be NULL there
+UNKNOWN_METHOD = "unknown"
+
+
+def _upsert(db: Session, model, keys: dict, counters: tuple, deltas: dict):
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+    table = model.__table__
+    stmt = insert(table).values(**keys, **{name: deltas.get(name, 0) for name in counters})
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(table.primary_key.columns),
+        set_={name: table.c[name] + value for name, value in deltas.items()},
+    )
+    db.execute(stmt)
+
+
+def bump(db: Session, play_id: int, date_time: datetime, **deltas):
+    """Add `deltas` to a showtime's counters, creating the row if needed."""
+    keys = {"ShowTime_Play_PlayId": play_id, "ShowTime_DateAndTime": date_time.replace(tzinfo=None)}
+    _upsert(db, ShowTimeSales, keys, COUNTERS, deltas)
+
+
+def _ticket_showtime(db: Session, ticket_no: str):
+    return (
+        db.query(Ticket.ShowTime_Play_PlayId, Ticket.ShowTime_DateAndTime)
+        .filter(Ticket.TicketNo == ticket_no)
+        .first()
+    )
+
+
+def addon_counts(addon):
+    return {
+        "addons_food": 1 if addon.food else 0,
+        "addons_drinks": 1 if addon.drinks else 0,
+        "addons_flowers": 1 if addon.flowers else 0,
+    }
+
+
+def bump_for_ticket(db: Session, ticket_no: str, **deltas):
+    # add-ons only know their ticket; charge its showtime
+    showtime = _ticket_showtime(db, ticket_no)
+    if showtime is not None:
+        bump(db, *showtime, **deltas)
+
+
+def record_payment(db: Session, payment, sign: int = 1):
+    """Count a payment (sign=1) or take it back out (sign=-1)."""
+    showtime = _ticket_showtime(db, payment.TicketNo)
+    if showtime is None:
+        return
+    play_id, date_time = showtime
+    deltas = {"tickets_paid": sign, "gross_revenue": sign * (payment.amount or 0)}
+    bump(db, play_id, date_time, **deltas)
+    bump_daily(db, play_id, date_time, payment.payment_method, **deltas)
+
+
+def bump_daily(db: Session, play_id: int, date_time: datetime, payment_method: str | None, **deltas):
+    keys = {
+        "day": date_time.date(),
+        "Play_PlayId": play_id,
+        "payment_method": payment_method or UNKNOWN_METHOD,
+    }
+    _upsert(db, DailySales, keys, DAILY_COUNTERS, deltas)
+
+
+def get_sales(db: Session, play_id: int, date_time: str):
+    dt = datetime.fromisoformat(date_time).replace(tzinfo=None)
+    row = db.get(ShowTimeSales, (dt, play_id))
+    counters = {name: getattr(row, name) if row else 0 for name in COUNTERS}
+    capacity = seatmap.VENUE_ROWS * seatmap.VENUE_SEATS_PER_ROW
+    return {
+        "ShowTime_Play_PlayId": play_id,
+        "ShowTime_DateAndTime": dt,
+        **counters,
+        "seats_remaining": max(capacity - counters["seats_sold"], 0),
+    }
+
+
+def rebuild(db: Session, showtimes: list[tuple] | None = None):
+    """Recompute counters from tickets, payments and add-ons.
+
+    Rebuilds every showtime, or only the given (play_id, date_time) pairs
+    together with the daily rows they fall on. Returns the number of
+    showtimes written.
+    """
+    showtime_table = ShowTimeSales.__table__
+    daily_table = DailySales.__table__
+    day = func.date(Ticket.ShowTime_DateAndTime)
+    method = func.coalesce(Payment.payment_method, UNKNOWN_METHOD)
+
+    wipe_showtimes = delete(showtime_table)
+    wipe_days = delete(daily_table)
+    showtime_totals = (
+        select(
+            Ticket.ShowTime_DateAndTime,
+            Ticket.ShowTime_Play_PlayId,
+            func.count(Ticket.TicketNo),
+            func.count(Payment.TicketNo),
+            func.coalesce(func.sum(Payment.amount), 0.0),
+            func.sum(case((func.coalesce(BookingAddon.food, "") != "", 1), else_=0)),
+            func.sum(case((func.coalesce(BookingAddon.drinks, "") != "", 1), else_=0)),
+            func.sum(case((BookingAddon.flowers.is_(True), 1), else_=0)),
+        )
+        .outerjoin(Payment, Payment.TicketNo == Ticket.TicketNo)
+        .outerjoin(BookingAddon, BookingAddon.TicketNo == Ticket.TicketNo)
+        .group_by(Ticket.ShowTime_DateAndTime, Ticket.ShowTime_Play_PlayId)
+    )
+    daily_totals = (
+        select(
+            day,
+            Ticket.ShowTime_Play_PlayId,
+            method,
+            func.count(Payment.TicketNo),
+            func.coalesce(func.sum(Payment.amount), 0.0),
+        )
+        .join(Payment, Payment.TicketNo == Ticket.TicketNo)
+        .group_by(day, Ticket.ShowTime_Play_PlayId, method)
+    )
+
+    if showtimes is not None:
+        keys = {(play_id, dt.replace(tzinfo=None)) for play_id, dt in showtimes}
+        if not keys:
+            return 0
+        days = {(play_id, dt.date()) for play_id, dt in keys}
+        wipe_showtimes = wipe_showtimes.where(
+            tuple_(showtime_table.c.ShowTime_Play_PlayId, showtime_table.c.ShowTime_DateAndTime).in_(keys)
+        )
+        wipe_days = wipe_days.where(tuple_(daily_table.c.Play_PlayId, daily_table.c.day).in_(days))
+        showtime_totals = showtime_totals.where(
+            tuple_(Ticket.ShowTime_Play_PlayId, Ticket.ShowTime_DateAndTime).in_(keys)
+        )
+        # a range per day, so the seat index serves both play and datetime
+        daily_totals = daily_totals.where(or_(*(
+            and_(Ticket.ShowTime_Play_PlayId == play_id,
+                 Ticket.ShowTime_DateAndTime >= start,
+                 Ticket.ShowTime_DateAndTime < start + timedelta(days=1))
+            for play_id, start in {(p, datetime(d.year, d.month, d.day)) for p, d in days}
+        )))
+
+    db.execute(wipe_showtimes)
+    db.execute(wipe_days)
+    result = db.execute(
+        insert(showtime_table).from_select(
+            ["ShowTime_DateAndTime", "ShowTime_Play_PlayId", *COUNTERS], showtime_totals
+        )
+    )
+    db.execute(
+        insert(daily_table).from_select(
+            ["day", "Play_PlayId", "payment_method", *DAILY_COUNTERS], daily_totals
+        )
+    )
+    return result.rowcount
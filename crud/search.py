@@ -0,0 +1,135 @@
+# crud/search.py
+# ───────────────────────────────────────
+# Full-text search over plays, actors and directors (SQLite FTS5).
+#
+# search_index holds one document per play (title, genre, synopsis and the
+# names of its cast and directors, so "comedy smith" finds the play) and one
+# per actor and director (their name). Each document's rowid is the entity
+# id times 4 plus a kind code, so any document can be replaced by rowid.
+#
+# Triggers on plays, actors and directors keep the index in step inside the
+# writing transaction, whichever path does the write: the crud functions,
+# admin updates, bulk changes, cascades or imports.
+from fastapi import HTTPException
+import re
+from sqlalchemy import Integer, column, text
+from sqlalchemy.orm import Session
+from pagination import decode_cursor, encode_cursor, DEFAULT_PAGE_SIZE
+
+KINDS = {"play": 1, "actor": 2, "director": 3}
+_KIND_NAMES = {code: name for name, code in KINDS.items()}
+# bm25 weights for title, genre, synopsis, people
+WEIGHTS = (10.0, 3.0, 1.0, 5.0)
+_OFFSET = column("offset", Integer)
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+_PLAY_DOC = """
+    INSERT INTO search_index (rowid, title, genre, synopsis, people, play_id)
+    SELECT p.PlayId * 4 + 1, p.Title, p.Genre, p.Synopsis,
+           (SELECT group_concat(Name, ' ') FROM (
+                SELECT Name FROM actors WHERE Play_PlayId = p.PlayId
+                UNION ALL
+                SELECT Name FROM directors WHERE Play_PlayId = p.PlayId)),
+           p.PlayId
+    FROM plays p WHERE p.PlayId = {play_id}
+"""
+
+
+def _refresh_play(play_id: str):
+    return f"DELETE FROM search_index WHERE rowid = {play_id} * 4 + 1;" + _PLAY_DOC.format(play_id=play_id) + ";"
+
+
+def _person_triggers(table: str, id_col: str, kind: int):
+    doc = (
+        f"INSERT INTO search_index (rowid, people, play_id) "
+        f"VALUES (new.{id_col} * 4 + {kind}, new.Name, new.Play_PlayId);"
+    )
+    drop = f"DELETE FROM search_index WHERE rowid = old.{id_col} * 4 + {kind};"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_search_ai AFTER INSERT ON {table} BEGIN "
+        f"{doc} {_refresh_play('new.Play_PlayId')} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_search_au AFTER UPDATE ON {table} BEGIN "
+        f"{drop} {doc} {_refresh_play('old.Play_PlayId')} {_refresh_play('new.Play_PlayId')} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_search_ad AFTER DELETE ON {table} BEGIN "
+        f"{drop} {_refresh_play('old.Play_PlayId')} END",
+    ]
+
+
+_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+    "title, genre, synopsis, people, play_id UNINDEXED, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    "CREATE TRIGGER IF NOT EXISTS plays_search_ai AFTER INSERT ON plays BEGIN "
+    f"{_refresh_play('new.PlayId')} END",
+    "CREATE TRIGGER IF NOT EXISTS plays_search_au AFTER UPDATE ON plays BEGIN "
+    f"DELETE FROM search_index WHERE rowid = old.PlayId * 4 + 1; {_refresh_play('new.PlayId')} END",
+    "CREATE TRIGGER IF NOT EXISTS plays_search_ad AFTER DELETE ON plays BEGIN "
+    "DELETE FROM search_index WHERE rowid = old.PlayId * 4 + 1; END",
+    *_person_triggers("actors", "ActorId", KINDS["actor"]),
+    *_person_triggers("directors", "DirectorId", KINDS["director"]),
+]
+
+
+def rebuild_index(db: Session):
+    """Rebuild every search document from the plays, actors and directors tables."""
+    db.execute(text("DELETE FROM search_index"))
+    db.execute(text(_PLAY_DOC.replace("WHERE p.PlayId = {play_id}", "")))
+    for table, id_col, kind in (("actors", "ActorId", KINDS["actor"]), ("directors", "DirectorId", KINDS["director"])):
+        db.execute(text(
+            f"INSERT INTO search_index (rowid, people, play_id) "
+            f"SELECT {id_col} * 4 + {kind}, Name, Play_PlayId FROM {table}"
+        ))
+    # merge the segments the bulk insert left behind
+    db.execute(text("INSERT INTO search_index (search_index) VALUES ('optimize')"))
+    return db.execute(text("SELECT count(*) FROM search_index")).scalar()
+
+
+def ensure_index(engine):
+    # create the FTS table and triggers; fill the table the first time
+    with engine.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'"
+        )).first()
+        for statement in _DDL:
+            conn.execute(text(statement))
+    if not exists:
+        with Session(engine) as db:
+            rebuild_index(db)
+            db.commit()
+
+
+def _match(q: str):
+    # every word must match, each as a prefix; quoting keeps FTS syntax out
+    tokens = _TOKEN.findall(q)
+    if not tokens:
+        raise HTTPException(status_code=400, detail="Search query has no words")
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search(db: Session, q: str, kind: str | None = None,
+           cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    """Ranked search; returns (results, next_cursor) like keyset()."""
+    offset = decode_cursor(cursor, [_OFFSET])[0] if cursor else 0
+    if not isinstance(offset, int) or offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    where = "search_index MATCH :match"
+    params = {"match": _match(q), "limit": limit + 1, "offset": offset}
+    if kind is not None:
+        where += " AND rowid % 4 = :kind"
+        params["kind"] = KINDS[kind]
+    weights = ", ".join(str(w) for w in WEIGHTS)
+    rows = db.execute(text(
+        f"SELECT rowid, coalesce(title, people) AS name, play_id, bm25(search_index, {weights}) AS score "
+        f"FROM search_index WHERE {where} ORDER BY score, rowid LIMIT :limit OFFSET :offset"
+    ), params).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([offset + limit])
+    results = [
+        {"type": _KIND_NAMES[row.rowid % 4], "id": row.rowid // 4, "play_id": row.play_id,
+         "name": row.name, "score": -row.score}
+        for row in rows
+    ]
+    return results, next_cursor
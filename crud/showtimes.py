@@ -1,29 +1,52 @@
 from datetime import datetime
+from sqlalchemy import and_
 from sqlalchemy.orm import Session
+from fastapi import HTTPException
 import models
+import seatmap
+import catalogue
+from crud import cascade
 from models import ShowTime
 from schemas import ShowTimeCreate
+from pagination import keyset, DEFAULT_PAGE_SIZE
 
 # create
 def create_showtime(db: Session, showtime: ShowTimeCreate):
     db_showtime = ShowTime(**showtime.dict())
     db.add(db_showtime)
     db.commit()
+    catalogue.invalidate("showtimes")
     db.refresh(db_showtime)
     return db_showtime
 
 # read
-def get_showtimes(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(ShowTime).offset(skip).limit(limit).all()
+def get_showtimes(db: Session, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    return keyset(db.query(ShowTime), [ShowTime.DateAndTime, ShowTime.Play_PlayId], cursor, limit)
 
-def get_upcoming_showtimes(db: Session, now: datetime | None = None):
+def get_showtimes_in_range(
+    db: Session,
+    start: datetime,
+    end: datetime | None = None,
+    play_id: int | None = None,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE
+):
+    # Index range scan on [start, end), optionally for one play, paged by key
+    query = db.query(ShowTime).filter(ShowTime.DateAndTime >= start)
+    if end is not None:
+        query = query.filter(ShowTime.DateAndTime < end)
+    if play_id is not None:
+        query = query.filter(ShowTime.Play_PlayId == play_id)
+    return keyset(query, [ShowTime.DateAndTime, ShowTime.Play_PlayId], cursor, limit)
+
+def get_upcoming_showtimes(
+    db: Session,
+    now: datetime | None = None,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE
+):
     now = now or datetime.utcnow()
-    return (
-        db.query(ShowTime)
-        .filter(ShowTime.DateAndTime >= now)
-        .order_by(ShowTime.DateAndTime)
-        .all()
-    )
+    return get_showtimes_in_range(db, now, cursor=cursor, limit=limit)
 
 def get_showtimes_by_play(db: Session, play_id: int):
     return (
@@ -33,6 +56,19 @@ def get_showtimes_by_play(db: Session, play_id: int):
         .all()
     )
 
+def get_seat_grid(db: Session, play_id: int, date_time: str):
+    dt = datetime.fromisoformat(date_time)
+    # the showtime only needs checking before its seat map is first loaded
+    if not seatmap.is_loaded(play_id, dt):
+        exists = (
+            db.query(ShowTime.Play_PlayId)
+            .filter(ShowTime.Play_PlayId == play_id, ShowTime.DateAndTime == dt.replace(tzinfo=None))
+            .first()
+        )
+        if not exists:
+            raise HTTPException(status_code=404, detail="Showtime not found")
+    return seatmap.grid(db, play_id, dt)
+
 # ── update
 def update_showtime(db: Session, play_id: int, date_time: str, updated: ShowTimeCreate):
     dt = datetime.fromisoformat(date_time)
@@ -48,6 +84,7 @@ def update_showtime(db: Session, play_id: int, date_time: str, updated: ShowTime
         for key, value in updated.dict().items():
             setattr(showtime, key, value)
         db.commit()
+        catalogue.invalidate("showtimes")
         db.refresh(showtime)
     return showtime
 
@@ -63,6 +100,9 @@ def delete_showtime(db: Session, play_id: int, date_time: str):
         .first()
     )
     if showtime:
-        db.delete(showtime)
-        db.commit()
+        db.expunge(showtime)
+        cascade.delete_tree(db, ShowTime, and_(
+            ShowTime.Play_PlayId == showtime.Play_PlayId,
+            ShowTime.DateAndTime == showtime.DateAndTime,
+        ))
     return showtime
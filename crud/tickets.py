@@ -1,26 +1,240 @@
+from sqlalchemy import and_, func, insert, literal_column, or_, select, tuple_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from models import Ticket, ShowTime
-from schemas import TicketCreate
+from models import Ticket, ShowTime, Payment
+from schemas import TicketCreate, SeatHoldCreate, SeatHoldConfirm, MAX_HOLD_SEATS
 from fastapi import HTTPException, status
 from datetime import datetime, timedelta
+import uuid
+import seatmap
+from auth_utils import CurrentUser
+from crud import sales, cascade
+from pagination import keyset, DEFAULT_PAGE_SIZE
 
 def create_ticket(db: Session, ticket: TicketCreate):
-    # Check if seat is already booked for this showtime
-    existing = db.query(Ticket).filter(
-        Ticket.Seat_RowNo == ticket.Seat_RowNo,
-        Ticket.Seat_SeatNo == ticket.Seat_SeatNo,
-        Ticket.ShowTime_DateAndTime == ticket.ShowTime_DateAndTime,
-        Ticket.ShowTime_Play_PlayId == ticket.ShowTime_Play_PlayId
-    ).first()
-    if existing:
+    # Claim the seat in the in-memory map first; conflicts are rejected
+    # without touching the tickets table
+    if not seatmap.claim(db, ticket.ShowTime_Play_PlayId, ticket.ShowTime_DateAndTime,
+                         ticket.Seat_RowNo, ticket.Seat_SeatNo):
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Seat already booked for this showtime.")
 
     db_ticket = Ticket(**ticket.dict())
     db.add(db_ticket)
-    db.commit()
+    try:
+        sales.bump(db, ticket.ShowTime_Play_PlayId, ticket.ShowTime_DateAndTime, seats_sold=1)
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        # The unique seat index catches bookings made by another process
+        if "Seat_SeatNo" in str(exc.orig):
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Seat already booked for this showtime.")
+        _release(ticket)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ticket number already exists.")
+    except Exception:
+        db.rollback()
+        _release(ticket)
+        raise
     db.refresh(db_ticket)
     return db_ticket
 
+def _release(ticket):
+    seatmap.release(ticket.ShowTime_Play_PlayId, ticket.ShowTime_DateAndTime,
+                    ticket.Seat_RowNo, ticket.Seat_SeatNo)
+
+MAX_BATCH_SIZE = 500
+
+def _conflict(ticket, reason: str):
+    return {
+        "TicketNo": ticket.TicketNo,
+        "Seat_RowNo": ticket.Seat_RowNo,
+        "Seat_SeatNo": ticket.Seat_SeatNo,
+        "ShowTime_DateAndTime": ticket.ShowTime_DateAndTime.isoformat(),
+        "ShowTime_Play_PlayId": ticket.ShowTime_Play_PlayId,
+        "reason": reason,
+    }
+
+def _seat(ticket):
+    return (ticket.ShowTime_Play_PlayId, ticket.ShowTime_DateAndTime.replace(tzinfo=None),
+            ticket.Seat_RowNo, ticket.Seat_SeatNo)
+
+def _reject_batch(conflicts):
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={"message": "Batch rejected; no tickets were booked.", "conflicts": conflicts},
+    )
+
+def _existing(db: Session, batch, numbers: set, seats: set):
+    # (conflicts, sold seats) for batch tickets whose seat is sold or whose
+    # number is taken
+    seat_cols = tuple_(Ticket.ShowTime_Play_PlayId, Ticket.ShowTime_DateAndTime,
+                       Ticket.Seat_RowNo, Ticket.Seat_SeatNo)
+    existing = db.query(Ticket).filter(
+        or_(Ticket.TicketNo.in_(numbers), seat_cols.in_(seats))
+    ).all()
+    if not existing:
+        return [], set()
+    sold = {_seat(e) for e in existing}
+    taken = {e.TicketNo for e in existing}
+    conflicts = []
+    for t in batch:
+        if _seat(t) in sold:
+            conflicts.append(_conflict(t, "seat already booked"))
+        elif t.TicketNo in taken:
+            conflicts.append(_conflict(t, "ticket number already exists"))
+    return conflicts, sold
+
+def create_tickets(db: Session, batch: list[TicketCreate]):
+    # All-or-nothing booking of many seats: one lookup, one transaction
+    if not batch:
+        raise HTTPException(status_code=400, detail="No tickets in batch.")
+    if len(batch) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} tickets per batch.")
+
+    conflicts = []
+    seen_numbers, seen_seats = set(), set()
+    for t in batch:
+        seat = _seat(t)
+        if t.TicketNo in seen_numbers:
+            conflicts.append(_conflict(t, "duplicate ticket number in batch"))
+        elif seat in seen_seats:
+            conflicts.append(_conflict(t, "duplicate seat in batch"))
+        seen_numbers.add(t.TicketNo)
+        seen_seats.add(seat)
+    if conflicts:
+        _reject_batch(conflicts)
+
+    # Check every requested seat and ticket number against the table at once
+    conflicts, _ = _existing(db, batch, seen_numbers, seen_seats)
+    if conflicts:
+        _reject_batch(conflicts)
+
+    # Claim the seats in memory per showtime so concurrent batches serialise
+    by_showtime: dict[tuple, list] = {}
+    for t in batch:
+        by_showtime.setdefault(_seat(t)[:2], []).append(t)
+    claimed = []
+    for (play_id, date_time), group in by_showtime.items():
+        taken = seatmap.claim_many(db, play_id, date_time, [(t.Seat_RowNo, t.Seat_SeatNo) for t in group])
+        if taken:
+            for t in claimed:
+                _release(t)
+            _reject_batch([_conflict(t, "seat already booked") for t in group
+                           if (t.Seat_RowNo, t.Seat_SeatNo) in taken])
+        claimed.extend(group)
+
+    rows = [t.dict() for t in batch]
+    try:
+        db.execute(insert(Ticket), rows)
+        for (play_id, date_time), group in by_showtime.items():
+            sales.bump(db, play_id, date_time, seats_sold=len(group))
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        # another process booked some of these meanwhile; seats it sold stay
+        # marked in the seat map, the rest are released
+        conflicts, sold = _existing(db, batch, seen_numbers, seen_seats)
+        for t in batch:
+            if _seat(t) not in sold:
+                _release(t)
+        _reject_batch(conflicts)
+    except Exception:
+        db.rollback()
+        for t in batch:
+            _release(t)
+        raise
+    return rows
+
+def _hold_out(hold: seatmap.Hold):
+    return {
+        "hold_id": hold.hold_id,
+        "ShowTime_DateAndTime": hold.date_time,
+        "ShowTime_Play_PlayId": hold.play_id,
+        "Customer_CustomerId": hold.customer_id,
+        "seats": [{"Seat_RowNo": r, "Seat_SeatNo": s} for r, s in hold.seats],
+        "expires_at": datetime.utcfromtimestamp(hold.expires_at),
+    }
+
+def hold_seats(db: Session, data: SeatHoldCreate, user: CurrentUser):
+    # Hold seats for checkout; they count as taken until confirmed or expired
+    seats = [(s.Seat_RowNo, s.Seat_SeatNo) for s in data.seats]
+    if not seats:
+        raise HTTPException(status_code=400, detail="No seats to hold.")
+    if len(seats) > MAX_HOLD_SEATS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_HOLD_SEATS} seats per hold.")
+    if len(set(seats)) != len(seats):
+        raise HTTPException(status_code=400, detail="Duplicate seat in hold.")
+    # box-office staff hold for many customers; only the customer limit applies to them
+    holder = None if user.role == "admin" else user.id
+    try:
+        hold, taken = seatmap.hold(db, data.ShowTime_Play_PlayId, data.ShowTime_DateAndTime,
+                                   seats, data.Customer_CustomerId, holder=holder)
+    except seatmap.HoldLimitReached:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Hold limit reached: {seatmap.HOLDS_PER_SHOWTIME} per customer and per account "
+                   "for a showtime; confirm or release a hold first.",
+        )
+    if hold is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Seats already booked or held.",
+                    "seats": [{"Seat_RowNo": r, "Seat_SeatNo": s} for r, s in taken]},
+        )
+    return _hold_out(hold)
+
+def _own_hold(hold_id: str, user: CurrentUser):
+    # other people's holds look like missing ones, so ids can't be probed
+    hold = seatmap.get_hold(hold_id)
+    if hold is None or (user.role != "admin" and hold.holder != user.id):
+        raise HTTPException(status_code=404, detail="Hold not found or expired.")
+
+def confirm_hold(db: Session, hold_id: str, data: SeatHoldConfirm, user: CurrentUser):
+    # Turn a live hold plus its payment into tickets, in one transaction
+    _own_hold(hold_id, user)
+    hold = seatmap.take_hold(hold_id)
+    if hold is None:
+        raise HTTPException(status_code=404, detail="Hold not found or expired.")
+    numbers = data.TicketNos or [uuid.uuid4().hex[:12].upper() for _ in hold.seats]
+    if len(numbers) != len(hold.seats) or len(set(numbers)) != len(numbers):
+        seatmap.restore_hold(hold)
+        raise HTTPException(status_code=400, detail="Give one distinct ticket number per held seat.")
+
+    rows = [
+        {"TicketNo": number, "Seat_RowNo": row_no, "Seat_SeatNo": seat_no,
+         "ShowTime_DateAndTime": hold.date_time, "ShowTime_Play_PlayId": hold.play_id,
+         "Customer_CustomerId": hold.customer_id}
+        for number, (row_no, seat_no) in zip(numbers, hold.seats)
+    ]
+    paid = [
+        {"TicketNo": number, "amount": data.amount, "payment_method": data.payment_method,
+         "status": "completed", "receipt_no": str(uuid.uuid4())[:8]}
+        for number in numbers
+    ]
+    count, revenue = len(rows), data.amount * len(rows)
+    try:
+        db.execute(insert(Ticket), rows)
+        db.execute(insert(Payment), paid)
+        sales.bump(db, hold.play_id, hold.date_time, seats_sold=count, tickets_paid=count, gross_revenue=revenue)
+        sales.bump_daily(db, hold.play_id, hold.date_time, data.payment_method,
+                         tickets_paid=count, gross_revenue=revenue)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        seatmap.restore_hold(hold)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail="Ticket number already exists or seat booked elsewhere.")
+    except Exception:
+        db.rollback()
+        seatmap.restore_hold(hold)
+        raise
+    return rows
+
+def cancel_hold(hold_id: str, user: CurrentUser):
+    _own_hold(hold_id, user)
+    if not seatmap.cancel_hold(hold_id):
+        raise HTTPException(status_code=404, detail="Hold not found or expired.")
+    return {"detail": "Hold released"}
+
 def get_ticket(db: Session, ticket_no: str):
     ticket = db.query(Ticket).filter(Ticket.TicketNo == ticket_no).first()
     if not ticket:
@@ -43,14 +257,43 @@ def delete_ticket(db: Session, ticket_no: str):
     if showtime.DateAndTime - datetime.utcnow() < timedelta(hours=3):
         raise HTTPException(status_code=403, detail="Ticket can only be canceled 3+ hours before the showtime")
 
-    db.delete(ticket)
-    db.commit()
+    # takes the ticket's payment and add-ons with it
+    cascade.delete_tree(db, Ticket, Ticket.TicketNo == ticket_no)
     return {"detail": "Ticket successfully canceled"}
 
-def get_all_tickets(db: Session):
-    return db.query(Ticket).all()
+def get_all_tickets(db: Session, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    return keyset(db.query(Ticket), [Ticket.TicketNo], cursor, limit)
 
 
 def get_ticket_by_number(db: Session, ticket_no: str):
     return db.query(Ticket).filter(Ticket.TicketNo == ticket_no).first()
 
+
+SEAT_COLUMNS = (Ticket.ShowTime_Play_PlayId, Ticket.ShowTime_DateAndTime, Ticket.Seat_RowNo, Ticket.Seat_SeatNo)
+
+def duplicate_seats(db):
+    """Seats sold more than once, as (play_id, date_time, row, seat, [TicketNo, ...]).
+
+    Each seat's tickets are listed keeper first: paid before unpaid, then
+    earliest sold. Such seats predate the unique seat index, which can't be
+    built until they are resolved.
+    """
+    doubled = select(*SEAT_COLUMNS).group_by(*SEAT_COLUMNS).having(func.count() > 1).subquery()
+    rows = db.execute(
+        select(*SEAT_COLUMNS, Ticket.TicketNo)
+        .join(doubled, and_(*(column == doubled.c[column.key] for column in SEAT_COLUMNS)))
+        .outerjoin(Payment, Payment.TicketNo == Ticket.TicketNo)
+        .order_by(*SEAT_COLUMNS, Payment.TicketNo.is_(None), literal_column("tickets.rowid"))
+    ).all()
+    groups = {}
+    for *seat, ticket_no in rows:
+        groups.setdefault(tuple(seat), []).append(ticket_no)
+    return [(*seat, numbers) for seat, numbers in groups.items()]
+
+def dedupe_seats(db: Session, dry_run: bool = False):
+    """Keep one ticket per doubly sold seat and delete the rest with their payments and add-ons."""
+    groups = duplicate_seats(db)
+    extra = [ticket_no for *_, numbers in groups for ticket_no in numbers[1:]]
+    if extra and not dry_run:
+        cascade.delete_tree(db, Ticket, Ticket.TicketNo.in_(extra))
+    return groups
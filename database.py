@@ -1,18 +1,73 @@
 # database.py
 
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+import metrics
+import queryprofile
 
 # SQLite database URL
 SQLALCHEMY_DATABASE_URL = "sqlite:///./concert.db"
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./concert.db"
+
+# Serve the async routes (routes/aio.py) in front of the sync ones
+USE_ASYNC_DB = os.getenv("USE_ASYNC_DB", "0") == "1"
+
+# Connection tuning profiles, picked with DB_PROFILE. The pragmas are applied
+# to every new pool connection.
+DB_PROFILES = {
+    # SQLite defaults: rollback journal, synchronous=FULL, no busy timeout
+    "default": {},
+    # WAL lets readers run alongside the single writer; NORMAL sync is
+    # durable across application crashes and only risks the last commits
+    # on power loss
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,        # ms to wait on a locked database
+        "cache_size": -64000,        # negative = KiB, so ~64 MB page cache
+        "mmap_size": 268435456,      # 256 MB memory-mapped reads
+        "temp_store": "MEMORY",
+    },
+}
+DB_PROFILE = os.getenv("DB_PROFILE", "default")
+if DB_PROFILE not in DB_PROFILES:
+    raise RuntimeError(f"Unknown DB_PROFILE {DB_PROFILE!r}; expected one of {sorted(DB_PROFILES)}")
+SQLITE_PRAGMAS = DB_PROFILES[DB_PROFILE]
+
+# Pool sizing, shared by the sync and async engines
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_ARGS = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT}
 
 # Engine configuration for SQLite
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, **POOL_ARGS
 )
 
-# Session factory
+# Async engine over the same database file, for the opt-in async path
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, **POOL_ARGS)
+
+
+def _apply_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+event.listen(engine, "connect", _apply_pragmas)
+event.listen(async_engine.sync_engine, "connect", _apply_pragmas)
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
+if queryprofile.ENABLED:
+    queryprofile.instrument_engine(engine)
+    queryprofile.instrument_engine(async_engine.sync_engine)
+
+# Session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 # Base class for model declarations
 Base = declarative_base()
@@ -24,3 +79,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency to get an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,17 +1,57 @@
+import sys
 from fastapi import FastAPI
-from database import Base, engine
+from fastapi.responses import PlainTextResponse
+import metrics
+import passwords
+import queryprofile
+import seatmap
+from crud import search, tickets
+from database import Base, engine, USE_ASYNC_DB
 from models import *
 
 from routes import (
     auth, play, ticket, addon, payment,
-    actor, director, customer, showtime
+    actor, director, customer, showtime, admin_route, aio, report, queue,
+    search as search_route
 )
 
 Base.metadata.create_all(bind=engine)
 
+# create_all() skips indexes on tables that already exist, so add new ones
+# here; existing names come from sqlite_master since reflection (and so
+# checkfirst) doesn't see expression indexes
+with engine.begin() as conn:
+    existing = set(conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'").scalars())
+    # the unique seat index can't be built over seats already sold twice
+    if "ux_tickets_showtime_seat" not in existing:
+        duplicates = tickets.duplicate_seats(conn)
+        if duplicates:
+            listing = "\n".join(
+                f"  play {play_id} at {date_time}, row {row} seat {seat}: tickets {', '.join(numbers)}"
+                for play_id, date_time, row, seat, numbers in duplicates[:50]
+            )
+            more = f"\n  ... and {len(duplicates) - 50} more" if len(duplicates) > 50 else ""
+            sys.exit(
+                f"{len(duplicates)} seats are sold more than once:\n{listing}{more}\n"
+                "Resolve them before starting the server; `python manage.py dedupe-seats` keeps "
+                "one ticket per seat (paid first, then earliest) and deletes the others."
+            )
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=conn)
+
+search.ensure_index(engine)
+
 app = FastAPI(title="Sierra Leone Concert Association API")
+app.add_middleware(metrics.MetricsMiddleware)
+if queryprofile.ENABLED:
+    app.add_middleware(queryprofile.QueryProfileMiddleware)
 
 # Route registration
+if USE_ASYNC_DB:
+    # registered first so these async handlers win over the sync ones below
+    app.include_router(aio.router)
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(play.router, prefix="/plays", tags=["Plays"])
 app.include_router(ticket.router, prefix="/tickets", tags=["Tickets"])
@@ -21,7 +61,27 @@ app.include_router(actor.router, prefix="/actors", tags=["Actors"])
 app.include_router(director.router, prefix="/directors", tags=["Directors"])
 app.include_router(customer.router, prefix="/customers", tags=["Customers"])
 app.include_router(showtime.router, prefix="/showtimes", tags=["Showtimes"])
+app.include_router(queue.router, prefix="/queue", tags=["Waiting Room"])
+app.include_router(search_route.router, prefix="/search", tags=["Search"])
+app.include_router(admin_route.router)
+app.include_router(report.router, prefix="/reports", tags=["Reports"])
+
+@app.on_event("startup")
+def start_hold_sweeper():
+    seatmap.start_sweeper()
+
+@app.on_event("shutdown")
+def shutdown_workers():
+    passwords.shutdown()
+    seatmap.stop_sweeper()
+    if queryprofile.ENABLED:
+        queryprofile.write_report()
 
 @app.get("/")
 def home():
-    return {"message": "Welcome to the Sierra Leone Concert Association API"}
\ No newline at end of file
+    return {"message": "Welcome to the Sierra Leone Concert Association API"}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    # async so the threadpool gauges are read on the event loop
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,100 @@
+# manage.py
+# ───────────────────────────────────────
+# Maintenance commands run outside the web process.
+#
+#   python manage.py rebuild-sales
+#   python manage.py rebuild-search
+#   python manage.py dedupe-seats --dry-run
+#   python manage.py import plays plays.csv --errors plays.errors.ndjson
+import argparse
+import json
+import sys
+from database import SessionLocal, engine
+import models
+from crud import sales, imports, search, tickets
+
+
+def rebuild_sales(args):
+    db = SessionLocal()
+    try:
+        count = sales.rebuild(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Rebuilt sales counters for {count} showtimes")
+
+
+def rebuild_search(args):
+    db = SessionLocal()
+    try:
+        count = search.rebuild_index(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Rebuilt search index with {count} documents")
+
+
+def dedupe_seats(args):
+    db = SessionLocal()
+    try:
+        groups = tickets.dedupe_seats(db, dry_run=args.dry_run)
+    finally:
+        db.close()
+    verb = "would delete" if args.dry_run else "deleted"
+    for play_id, date_time, row, seat, numbers in groups:
+        print(f"play {play_id} at {date_time}, row {row} seat {seat}: kept {numbers[0]}, {verb} {', '.join(numbers[1:])}")
+    print(f"{len(groups)} seats sold more than once")
+
+
+def import_file(args):
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    errors = open(args.errors, "w", encoding="utf-8") if args.errors else sys.stderr
+
+    def write_error(line_no, row, message):
+        errors.write(json.dumps({"line": line_no, "error": message, "row": row}) + "\n")
+
+    db = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as stream:
+            report = imports.import_rows(
+                db, args.entity, imports.read_rows(stream, fmt), write_error, args.chunk_size
+            )
+    finally:
+        db.close()
+        if errors is not sys.stderr:
+            errors.close()
+    print(f"{report['entity']}: {report['inserted']} of {report['total']} rows imported, {report['failed']} rejected")
+    return 1 if report["failed"] else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Theatre booking maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-sales", help="recompute per-showtime sales counters from the raw tables")
+    rebuild.set_defaults(func=rebuild_sales)
+
+    reindex = commands.add_parser("rebuild-search", help="rebuild the full-text search index from the catalogue tables")
+    reindex.set_defaults(func=rebuild_search)
+
+    dedupe = commands.add_parser("dedupe-seats", help="keep one ticket per seat sold more than once, so the unique seat index can be built")
+    dedupe.add_argument("--dry-run", action="store_true", help="list the duplicates without deleting")
+    dedupe.set_defaults(func=dedupe_seats)
+
+    load = commands.add_parser("import", help="bulk import catalogue or customer rows from CSV or NDJSON")
+    load.add_argument("entity", choices=sorted(imports.IMPORTS))
+    load.add_argument("path")
+    load.add_argument("--format", choices=["csv", "ndjson"], help="default: from the file extension")
+    load.add_argument("--errors", help="write rejected rows here as NDJSON (default: stderr)")
+    load.add_argument("--chunk-size", type=int, default=imports.IMPORT_CHUNK_SIZE)
+    load.set_defaults(func=import_file)
+
+    args = parser.parse_args(argv)
+    # make sure tables added since the last server start exist
+    models.Base.metadata.create_all(bind=engine)
+    search.ensure_index(engine)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+# metrics.py
+# ───────────────────────────────────────
+# Request instrumentation, served at /metrics in the Prometheus text format.
+#
+# MetricsMiddleware times every HTTP request by route template and counts
+# the requests in flight. SQLAlchemy cursor events add each statement's time
+# to the request that ran it (a context variable carries the per-request
+# tally into the threadpool), so every route also gets a histogram of
+# queries and DB time per request. Gauges read the request threadpool's
+# queue at scrape time; passwords.py records bcrypt time.
+#
+# Everything is plain counters behind one lock per metric: an observation is
+# a bisect and a few additions, cheap enough to leave on.
+import bisect
+import contextvars
+import threading
+import time
+import anyio.to_thread
+from sqlalchemy import event
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+# indexed SQLite reads take tens of microseconds, so these start well below 1 ms
+QUERY_TIME_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+HASH_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0, 5.0)
+# requests that match no route share one label, so stray paths can't grow
+# the number of series
+UNMATCHED_ROUTE = "<unmatched>"
+
+REGISTRY: list = []
+
+
+def _escape(value: str):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple, extra: str = ""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._series: dict = {}
+        REGISTRY.append(self)
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            series = list(self._series.items())
+        return [f"{self.name}{_labels(self.labels, key)} {value}" for key, value in series]
+
+
+class Gauge(Counter):
+    """A value that goes up and down, or is read from `collect` at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), collect=None):
+        super().__init__(name, help, labels)
+        self.collect = collect
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+    def _samples(self):
+        if self.collect is None:
+            return super()._samples()
+        try:
+            value = self.collect()
+        except RuntimeError:
+            # e.g. the threadpool gauges when read outside the event loop
+            return []
+        return [f"{self.name} {value}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: tuple, labels: tuple = ()):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # per-bucket counts (last one is +Inf), then sum
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def _samples(self):
+        with self._lock:
+            series = [(key, list(values)) for key, values in self._series.items()]
+        lines = []
+        for key, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {values[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+def _threadpool(field: str):
+    # anyio's default limiter is the pool sync routes and dependencies run in
+    return lambda: getattr(anyio.to_thread.current_default_thread_limiter().statistics(), field)
+
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency by route.",
+                            LATENCY_BUCKETS, ("method", "route"))
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served.")
+REQUEST_QUERIES = Histogram("http_request_db_queries", "Database statements run per request.",
+                            QUERY_BUCKETS, ("method", "route"))
+REQUEST_DB_TIME = Histogram("http_request_db_seconds", "Time spent in database statements per request.",
+                            QUERY_TIME_BUCKETS, ("method", "route"))
+QUERY_LATENCY = Histogram("db_query_duration_seconds", "Database statement latency.", QUERY_TIME_BUCKETS)
+THREADPOOL_BUSY = Gauge("threadpool_busy_threads", "Request threadpool threads in use.",
+                        collect=_threadpool("borrowed_tokens"))
+THREADPOOL_WAITING = Gauge("threadpool_queue_depth", "Tasks waiting for a request threadpool thread.",
+                           collect=_threadpool("tasks_waiting"))
+THREADPOOL_SIZE = Gauge("threadpool_size", "Request threadpool capacity.",
+                        collect=_threadpool("total_tokens"))
+PASSWORD_TIME = Histogram("password_hash_seconds", "bcrypt hash and verify time, queueing included.",
+                          HASH_BUCKETS, ("operation",))
+PASSWORD_PENDING = Gauge("password_jobs_pending", "bcrypt jobs queued or running in the hashing pool.")
+
+
+class _RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_request: contextvars.ContextVar[_RequestStats | None] = contextvars.ContextVar("metrics_request", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_metrics_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    QUERY_LATENCY.observe(elapsed)
+    stats = _request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+def instrument_engine(engine):
+    """Time every statement `engine` runs (pass async_engine.sync_engine for async)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def route_template(scope):
+    # routing records the match in the shared scope; FastAPI versions that
+    # keep included routes relative to their router put the full template
+    # in their own entry
+    context = (scope.get("fastapi") or {}).get("effective_route_context")
+    if context is not None:
+        return context.path_format
+    return getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses pass straight through."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = _RequestStats()
+        token = _request.set(stats)
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec()
+            _request.reset(token)
+            path = route_template(scope)
+            method = scope["method"]
+            REQUESTS.inc(method, path, str(status_code))
+            REQUEST_LATENCY.observe(elapsed, method, path)
+            REQUEST_QUERIES.observe(stats.queries, method, path)
+            REQUEST_DB_TIME.observe(stats.db_seconds, method, path)
+
+
+def render():
+    """Every metric in the text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -1,10 +1,22 @@
 # models.py
 # ───────────────────────────────────────
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Boolean, Float
-from sqlalchemy.orm import declarative_base
+from sqlalchemy import Column, String, Integer, Date, DateTime, ForeignKey, Boolean, Float, Index, func, literal_column
+from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
 
+# characters dropped when phone numbers are compared, so "+232 (76) 123-456"
+# and "23276123456" are the same number
+PHONE_PUNCTUATION = " -+()./"
+
+
+def phone_digits(column):
+    # literal_column keeps the characters inline, so queries repeat the
+    # indexed expression exactly instead of binding parameters
+    for char in PHONE_PUNCTUATION:
+        column = func.replace(column, literal_column(f"'{char}'"), literal_column("''"))
+    return column
+
 # users
 
 class User(Base):
@@ -27,6 +39,10 @@ class Play(Base):
     Genre = Column(String)
     Synopsis = Column(String)
 
+    actors = relationship("Actor", back_populates="play", order_by="Actor.ActorId")
+    directors = relationship("Director", back_populates="play", order_by="Director.DirectorId")
+    showtimes = relationship("ShowTime", back_populates="play", order_by="ShowTime.DateAndTime")
+
 # customers
 class Customer(Base):
     __tablename__ = "customers"
@@ -34,13 +50,21 @@ class Customer(Base):
     Name = Column(String)
     TelephoneNo = Column(String)
 
+    # box-office lookups by phone number and by name as typed
+    __table_args__ = (
+        Index("ix_customers_phone_digits", phone_digits(TelephoneNo)),
+        Index("ix_customers_name_lower", func.lower(Name)),
+    )
+
 # actors
 class Actor(Base):
     __tablename__ = "actors"
     ActorId = Column(Integer, primary_key=True, index=True)
     Name = Column(String)
     Gender = Column(String)
-    Play_PlayId = Column(Integer, ForeignKey("plays.PlayId"))
+    Play_PlayId = Column(Integer, ForeignKey("plays.PlayId"), index=True)
+
+    play = relationship("Play", back_populates="actors")
 
 # directors
 class Director(Base):
@@ -48,7 +72,9 @@ class Director(Base):
     DirectorId = Column(Integer, primary_key=True, index=True)
     Name = Column(String)
     Gender = Column(String)
-    Play_PlayId = Column(Integer, ForeignKey("plays.PlayId"))
+    Play_PlayId = Column(Integer, ForeignKey("plays.PlayId"), index=True)
+
+    play = relationship("Play", back_populates="directors")
 
 # showtimes
 class ShowTime(Base):
@@ -56,6 +82,14 @@ class ShowTime(Base):
     DateAndTime = Column(DateTime, primary_key=True)
     Play_PlayId = Column(Integer, ForeignKey("plays.PlayId"), primary_key=True)
 
+    play = relationship("Play", back_populates="showtimes")
+
+    # The primary key index already leads with DateAndTime and serves
+    # date-range scans; this one serves per-play schedules
+    __table_args__ = (
+        Index("ix_showtimes_play_datetime", "Play_PlayId", "DateAndTime"),
+    )
+
 # tickets
 class Ticket(Base):
     __tablename__ = "tickets"
@@ -66,6 +100,21 @@ class Ticket(Base):
     ShowTime_Play_PlayId = Column(Integer)
     Customer_CustomerId = Column(Integer, ForeignKey("customers.CustomerId"))
 
+    # one ticket per seat per showtime; also serves the seat lookups
+    __table_args__ = (
+        Index(
+            "ux_tickets_showtime_seat",
+            "ShowTime_Play_PlayId", "ShowTime_DateAndTime", "Seat_RowNo", "Seat_SeatNo",
+            unique=True,
+        ),
+        # a customer's history in date order, answered from the index alone
+        Index(
+            "ix_tickets_customer_datetime",
+            "Customer_CustomerId", "ShowTime_DateAndTime", "TicketNo",
+            "ShowTime_Play_PlayId", "Seat_RowNo", "Seat_SeatNo",
+        ),
+    )
+
 # booking-addons
 class BookingAddon(Base):
     __tablename__ = "bookingaddons"
@@ -82,3 +131,26 @@ class Payment(Base):
     payment_method = Column(String)
     status = Column(String)
     receipt_no = Column(String, unique=True)
+
+# per-showtime sales counters, kept in step by the ticket, payment and
+# add-on writes (see crud/sales.py)
+class ShowTimeSales(Base):
+    __tablename__ = "showtime_sales"
+    ShowTime_DateAndTime = Column(DateTime, primary_key=True)
+    ShowTime_Play_PlayId = Column(Integer, primary_key=True)
+    seats_sold = Column(Integer, default=0, nullable=False)
+    tickets_paid = Column(Integer, default=0, nullable=False)
+    gross_revenue = Column(Float, default=0.0, nullable=False)
+    addons_food = Column(Integer, default=0, nullable=False)
+    addons_drinks = Column(Integer, default=0, nullable=False)
+    addons_flowers = Column(Integer, default=0, nullable=False)
+
+# daily revenue rollup by play and payment method; the day is the date of
+# the showtime the ticket is for
+class DailySales(Base):
+    __tablename__ = "daily_sales"
+    day = Column(Date, primary_key=True)
+    Play_PlayId = Column(Integer, primary_key=True)
+    payment_method = Column(String, primary_key=True)
+    tickets_paid = Column(Integer, default=0, nullable=False)
+    gross_revenue = Column(Float, default=0.0, nullable=False)
@@ -0,0 +1,113 @@
+# pagination.py
+# ───────────────────────────────────────
+# Keyset (cursor) pagination and chunked streaming exports.
+#
+# List endpoints page on the primary key: the cursor is the key of the last
+# row returned, so every page is an index seek no matter how deep it is.
+# The cursor for the next page is sent back in the X-Next-Cursor header and
+# is absent on the last page.
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException, Response
+from sqlalchemy import literal, select, tuple_
+from sqlalchemy.orm import Query
+import database
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+EXPORT_CHUNK_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode_cursor(values: list):
+    raw = json.dumps(values, default=_json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: list):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [
+            datetime.fromisoformat(v) if column.type.python_type is datetime else v
+            for column, v in zip(columns, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _after(columns: list, cursor: str):
+    # WHERE clause selecting rows strictly after the cursor position
+    values = decode_cursor(cursor, columns)
+    if len(columns) == 1:
+        return columns[0] > values[0]
+    bound = [literal(v, type_=c.type) for c, v in zip(columns, values)]
+    return tuple_(*columns) > tuple_(*bound)
+
+
+def _split(rows: list, columns: list, limit: int):
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], c.key) for c in columns])
+
+
+def keyset(query: Query, columns: list, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    """Return (rows, next_cursor) for the page after `cursor`, ordered by `columns`."""
+    if cursor:
+        query = query.filter(_after(columns, cursor))
+    return _split(query.order_by(*columns).limit(limit + 1).all(), columns, limit)
+
+
+async def akeyset(db, stmt, columns: list, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    """keyset() for an AsyncSession and a select() of one entity."""
+    if cursor:
+        stmt = stmt.where(_after(columns, cursor))
+    rows = (await db.scalars(stmt.order_by(*columns).limit(limit + 1))).all()
+    return _split(list(rows), columns, limit)
+
+
+def page(response: Response, result):
+    # unpack a keyset() result for a list route, moving the cursor to a header
+    rows, next_cursor = result
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
+
+
+def stream_rows(model, fmt: str = "ndjson", exclude: tuple = (), chunk_size: int = EXPORT_CHUNK_SIZE):
+    """Yield every row of `model`'s table as NDJSON lines or one JSON array.
+
+    Rows come straight off a Core cursor in chunks of `chunk_size`, so memory
+    stays flat regardless of table size. The generator owns its own session
+    because it outlives the request's dependency.
+    """
+    columns = [c for c in model.__table__.columns if c.key not in exclude]
+    pk = list(model.__table__.primary_key.columns)
+    stmt = select(*columns).order_by(*pk).execution_options(yield_per=chunk_size)
+
+    db = database.SessionLocal()
+    try:
+        first = True
+        if fmt == "json":
+            yield "["
+        for chunk in db.execute(stmt).mappings().partitions():
+            lines = [json.dumps(dict(row), default=_json_default) for row in chunk]
+            if fmt == "json":
+                yield ("" if first else ",") + ",".join(lines)
+            else:
+                yield "\n".join(lines) + "\n"
+            first = False
+        if fmt == "json":
+            yield "]"
+    finally:
+        db.close()
@@ -0,0 +1,136 @@
+# passwords.py
+# ───────────────────────────────────────
+# bcrypt hashing off the request threads.
+#
+# Hashes and verifications run in a process pool so they use every core
+# instead of queueing on the GIL and starving the threadpool that serves all
+# other routes. The number of jobs waiting or running is capped; callers past
+# the cap get a 429 instead of piling up.
+#
+# Routes await the async variants (ahash_password, averify_password) so a
+# pending hash holds no thread at all; the sync ones block their caller.
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+import metrics
+
+# Work factor for new hashes. Hashes at any other cost are re-hashed the next
+# time the user logs in.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# 0 workers hashes inline on the calling thread (tests, single-core boxes)
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", str(max(HASH_WORKERS, 1) * 8)))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(HASH_WORKERS, 1) + HASH_QUEUE_SIZE)
+
+
+def _hash(plain: str):
+    return pwd_context.hash(plain)
+
+
+def _verify_and_update(plain: str, hashed: str):
+    return pwd_context.verify_and_update(plain, hashed)
+
+
+def _executor():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn, not fork: the server process is multi-threaded
+                _pool = ProcessPoolExecutor(HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _submit(fn, *args):
+    # the pool future for fn(*args), or a 429 once the queue is full
+    if not _slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many password operations in progress, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    metrics.PASSWORD_PENDING.inc()
+    try:
+        future = _executor().submit(fn, *args)
+    except Exception:
+        _slots.release()
+        metrics.PASSWORD_PENDING.dec()
+        raise
+    future.add_done_callback(_finished)
+    return future
+
+
+def _finished(future):
+    _slots.release()
+    metrics.PASSWORD_PENDING.dec()
+
+
+def _run(fn, *args):
+    if HASH_WORKERS <= 0:
+        return fn(*args)
+    return _submit(fn, *args).result()
+
+
+async def _arun(fn, *args):
+    if HASH_WORKERS <= 0:
+        return await run_in_threadpool(fn, *args)
+    return await asyncio.wrap_future(_submit(fn, *args))
+
+
+def _timed(operation: str, fn, *args):
+    start = time.perf_counter()
+    try:
+        return _run(fn, *args)
+    finally:
+        metrics.PASSWORD_TIME.observe(time.perf_counter() - start, operation)
+
+
+async def _atimed(operation: str, fn, *args):
+    start = time.perf_counter()
+    try:
+        return await _arun(fn, *args)
+    finally:
+        metrics.PASSWORD_TIME.observe(time.perf_counter() - start, operation)
+
+
+def hash_password(plain: str):
+    return _timed("hash", _hash, plain)
+
+
+def verify_password(plain: str, hashed: str):
+    """Return (valid, new_hash); new_hash is set when the stored cost is stale."""
+    return _timed("verify", _verify_and_update, plain, hashed)
+
+
+async def ahash_password(plain: str):
+    return await _atimed("hash", _hash, plain)
+
+
+async def averify_password(plain: str, hashed: str):
+    """verify_password() for async callers."""
+    return await _atimed("verify", _verify_and_update, plain, hashed)
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
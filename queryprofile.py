@@ -0,0 +1,200 @@
+# queryprofile.py
+# ───────────────────────────────────────
+# Opt-in query profiler (QUERY_PROFILE=1).
+#
+# Hooks the engines' cursor events and, per request:
+#   - logs statements slower than SLOW_QUERY_MS with their EXPLAIN QUERY PLAN
+#   - flags statements whose plan scans a whole table (each distinct
+#     statement is explained once and the plan cached); a scan that the
+#     plan returns in ORDER BY order under a LIMIT, such as the first page
+#     of a keyset list walking the rowid, stops after LIMIT rows and is
+#     reported separately as an ordered scan
+#   - flags statement shapes run QUERY_REPEAT_THRESHOLD or more times in one
+#     request, the signature of an N+1 loop
+# and keeps a per-route summary. report() returns it with sorted keys, and
+# it is written to QUERY_PROFILE_REPORT on shutdown, so two releases can be
+# compared with a plain diff.
+#
+# Explaining statements costs a query each, so leave this off in production.
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from sqlalchemy import event
+import metrics
+
+ENABLED = os.getenv("QUERY_PROFILE", "0") == "1"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+REPORT_PATH = os.getenv("QUERY_PROFILE_REPORT", "query-profile.json")
+# distinct statements whose plans are kept
+MAX_PLANS = 5000
+# plan rows like "SCAN plays": a table read end to end, no index involved
+_TABLE_SCAN = re.compile(r"^SCAN (\w+)$")
+_ORDERED_LIMIT = re.compile(r"\bORDER BY\b.*\bLIMIT\b", re.IGNORECASE | re.DOTALL)
+# expanded IN lists vary in length; count them as one shape
+_IN_LIST = re.compile(r"\((?:\?|:\w+)(?:,\s*(?:\?|:\w+))*\)")
+_EXPLAINABLE = ("SELECT", "UPDATE", "DELETE", "INSERT", "WITH")
+
+log = logging.getLogger("queryprofile")
+
+
+class _RequestProfile:
+    __slots__ = ("shapes", "queries", "db_seconds", "slow", "scans", "ordered_scans")
+
+    def __init__(self):
+        self.shapes = Counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.slow = 0
+        self.scans = set()
+        self.ordered_scans = set()
+
+
+class _RouteSummary:
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_seconds = 0.0
+        self.slow = 0
+        self.scans = set()
+        self.ordered_scans = set()
+        self.repeated: dict[str, int] = {}
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "queries_per_request": round(self.queries / self.requests, 2),
+            "max_queries": self.max_queries,
+            "db_ms_per_request": round(self.db_seconds * 1000 / self.requests, 3),
+            "slow_queries": self.slow,
+            "table_scans": sorted(self.scans),
+            "ordered_scans": sorted(self.ordered_scans),
+            "repeated_statements": dict(sorted(self.repeated.items())),
+        }
+
+
+_request: contextvars.ContextVar[_RequestProfile | None] = contextvars.ContextVar("query_profile", default=None)
+_lock = threading.Lock()
+_routes: dict[str, _RouteSummary] = {}
+_plans: dict[str, list[str]] = {}
+
+
+def shape(statement: str):
+    return _IN_LIST.sub("(?)", " ".join(statement.split()))
+
+
+def _explain(conn, statement: str, parameters):
+    # run on the same DBAPI connection, so the plan sees the same schema
+    if statement in _plans:
+        return _plans[statement]
+    if not statement.lstrip().upper().startswith(_EXPLAINABLE):
+        return []
+    try:
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+            plan = [row[-1] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    except Exception:
+        plan = []
+    if len(_plans) < MAX_PLANS:
+        _plans[statement] = plan
+    return plan
+
+
+def _stops_at_limit(statement: str, plan: list[str]):
+    # no temp b-tree means rows come off the scan already in ORDER BY order,
+    # so LIMIT ends the read early
+    return bool(_ORDERED_LIMIT.search(statement)) and not any(row.startswith("USE TEMP B-TREE") for row in plan)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._profile_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_profile_start", None)
+    profile = _request.get()
+    if start is None or profile is None:
+        return
+    elapsed = time.perf_counter() - start
+    profile.queries += 1
+    profile.db_seconds += elapsed
+    profile.shapes[shape(statement)] += 1
+    if executemany:
+        return
+
+    first_sight = statement not in _plans
+    plan = _explain(conn, statement, parameters)
+    scans = {m.group(1) for m in map(_TABLE_SCAN.match, plan) if m}
+    if scans and _stops_at_limit(statement, plan):
+        profile.ordered_scans |= scans
+        scans = set()
+    if scans and first_sight:
+        log.warning("full table scan of %s: %s\n  plan: %s", ", ".join(sorted(scans)), statement, "; ".join(plan))
+    profile.scans |= scans
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        profile.slow += 1
+        log.warning("slow query (%.1f ms): %s\n  parameters: %.200r\n  plan: %s",
+                    elapsed * 1000, statement, parameters, "; ".join(plan))
+
+
+def _finish(route: str, profile: _RequestProfile):
+    repeated = {s: n for s, n in profile.shapes.items() if n >= QUERY_REPEAT_THRESHOLD}
+    for statement, count in repeated.items():
+        log.warning("%s ran one statement %d times (possible N+1): %s", route, count, statement)
+    with _lock:
+        summary = _routes.get(route)
+        if summary is None:
+            summary = _routes[route] = _RouteSummary()
+        summary.requests += 1
+        summary.queries += profile.queries
+        summary.max_queries = max(summary.max_queries, profile.queries)
+        summary.db_seconds += profile.db_seconds
+        summary.slow += profile.slow
+        summary.scans |= profile.scans
+        summary.ordered_scans |= profile.ordered_scans
+        for statement, count in repeated.items():
+            summary.repeated[statement] = max(summary.repeated.get(statement, 0), count)
+
+
+class QueryProfileMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        profile = _RequestProfile()
+        token = _request.set(profile)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request.reset(token)
+            _finish(f"{scope['method']} {metrics.route_template(scope)}", profile)
+
+
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def report():
+    """Per-route query summary, keyed "METHOD /route/template"."""
+    with _lock:
+        return {route: _routes[route].as_dict() for route in sorted(_routes)}
+
+
+def write_report(path: str = REPORT_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report(), f, indent=2, sort_keys=True)
+        f.write("\n")
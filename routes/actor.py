@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 from crud import actors
 from schemas import Actor, ActorCreate
 from database import get_db
 from auth_utils import require_role   # only needed for write ops
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from catalogue import cached_response
 
 router = APIRouter()
 
@@ -35,12 +37,20 @@ def delete_actor(
 
 # ── read operations (open to all) ────────────────────────────────
 @router.get("/", response_model=list[Actor], status_code=status.HTTP_200_OK)
-def get_actors(db: Session = Depends(get_db)):
-    return actors.get_actors(db)
+def get_actors(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    return cached_response(request, "actors", (cursor, limit), Actor,
+                           lambda: actors.get_actors(db, cursor, limit))
 
 @router.get("/{actor_id}", response_model=Actor, status_code=status.HTTP_200_OK)
-def get_actor(actor_id: int, db: Session = Depends(get_db)):
-    actor = actors.get_actor(db, actor_id)
-    if actor is None:
-        raise HTTPException(status_code=404, detail="Actor not found")
-    return actor
+def get_actor(actor_id: int, request: Request, db: Session = Depends(get_db)):
+    def load():
+        actor = actors.get_actor(db, actor_id)
+        if actor is None:
+            raise HTTPException(status_code=404, detail="Actor not found")
+        return actor
+    return cached_response(request, "actors", actor_id, Actor, load)
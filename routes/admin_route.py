@@ -1,17 +1,26 @@
 # app/routers/admin_routes.py
-from fastapi import APIRouter, Depends, HTTPException, status
+import io
+from datetime import datetime
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from database import get_db
+import models
 from models import User
-from schemas import User as UserSchema
+from schemas import User as UserSchema, ShowTimeSales, BulkUpdate, BulkDelete, BulkResult, WaitingRoomConfig
 from auth_utils import require_role
 import crud.admin as admin_crud
+from crud import sales, imports, bulk
+from pagination import page, stream_rows, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+import columnar
+import waitingroom
+import queryprofile
 
 router = APIRouter(prefix="/admin", tags=["Admin Panel"])
 
 @router.get("/users", response_model=list[UserSchema], dependencies=[Depends(require_role("admin"))])
-def get_all_users(db: Session = Depends(get_db)):
-    return admin_crud.get_all_users(db)
+def get_all_users(response: Response, cursor: str | None = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), db: Session = Depends(get_db)):
+    return page(response, admin_crud.get_all_users(db, cursor, limit))
 
 @router.get("/users/{user_id}", response_model=UserSchema, dependencies=[Depends(require_role("admin"))])
 def get_user(user_id: int, db: Session = Depends(get_db)):
@@ -27,8 +36,8 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
 
 # Plays Management
 @router.get("/plays", dependencies=[Depends(require_role("admin"))])
-def get_all_plays(db: Session = Depends(get_db)):
-    return admin_crud.get_all_plays(db)
+def get_all_plays(response: Response, cursor: str | None = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), db: Session = Depends(get_db)):
+    return page(response, admin_crud.get_all_plays(db, cursor, limit))
 
 @router.get("/plays/{play_id}", dependencies=[Depends(require_role("admin"))])
 def get_play(play_id: int, db: Session = Depends(get_db)):
@@ -44,8 +53,38 @@ def delete_play(play_id: int, db: Session = Depends(get_db)):
 
 # ShowTimes Management
 @router.get("/showtimes", dependencies=[Depends(require_role("admin"))])
-def get_all_showtimes(db: Session = Depends(get_db)):
-    return admin_crud.get_all_showtimes(db)
+def get_all_showtimes(response: Response, cursor: str | None = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), db: Session = Depends(get_db)):
+    return page(response, admin_crud.get_all_showtimes(db, cursor, limit))
+
+@router.get("/showtimes/{play_id}/{date_time}/sales", response_model=ShowTimeSales, dependencies=[Depends(require_role("admin"))])
+def get_showtime_sales(play_id: int, date_time: str, db: Session = Depends(get_db)):
+    return sales.get_sales(db, play_id, date_time)
+
+@router.put("/showtimes/{play_id}/{date_time}/waiting-room", dependencies=[Depends(require_role("admin"))])
+def open_waiting_room(play_id: int, date_time: datetime, data: WaitingRoomConfig):
+    return waitingroom.open_room(play_id, date_time, data.rate)
+
+@router.get("/showtimes/{play_id}/{date_time}/waiting-room", dependencies=[Depends(require_role("admin"))])
+def get_waiting_room(play_id: int, date_time: datetime):
+    return waitingroom.stats(play_id, date_time)
+
+@router.delete("/showtimes/{play_id}/{date_time}/waiting-room", dependencies=[Depends(require_role("admin"))])
+def close_waiting_room(play_id: int, date_time: datetime):
+    if not waitingroom.close_room(play_id, date_time):
+        raise HTTPException(status_code=404, detail="No waiting room for this showtime")
+    return {"detail": "Waiting room closed"}
+
+@router.post("/sales/rebuild", dependencies=[Depends(require_role("admin"))])
+def rebuild_sales(db: Session = Depends(get_db)):
+    count = sales.rebuild(db)
+    db.commit()
+    return {"detail": f"Rebuilt sales counters for {count} showtimes"}
+
+@router.get("/query-profile", dependencies=[Depends(require_role("admin"))])
+def query_profile():
+    if not queryprofile.ENABLED:
+        raise HTTPException(status_code=404, detail="Query profiling is off; start the server with QUERY_PROFILE=1")
+    return queryprofile.report()
 
 @router.get("/showtimes/{play_id}/{date_time}", dependencies=[Depends(require_role("admin"))])
 def get_showtime(play_id: int, date_time: str, db: Session = Depends(get_db)):
@@ -61,8 +100,8 @@ def delete_showtime(play_id: int, date_time: str, db: Session = Depends(get_db))
 
 # Customers Management
 @router.get("/customers", dependencies=[Depends(require_role("admin"))])
-def get_all_customers(db: Session = Depends(get_db)):
-    return admin_crud.get_all_customers(db)
+def get_all_customers(response: Response, cursor: str | None = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), db: Session = Depends(get_db)):
+    return page(response, admin_crud.get_all_customers(db, cursor, limit))
 
 @router.get("/customers/{customer_id}", dependencies=[Depends(require_role("admin"))])
 def get_customer(customer_id: int, db: Session = Depends(get_db)):
@@ -78,8 +117,8 @@ def delete_customer(customer_id: int, db: Session = Depends(get_db)):
 
 # Actors Management
 @router.get("/actors", dependencies=[Depends(require_role("admin"))])
-def get_all_actors(db: Session = Depends(get_db)):
-    return admin_crud.get_all_actors(db)
+def get_all_actors(response: Response, cursor: str | None = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), db: Session = Depends(get_db)):
+    return page(response, admin_crud.get_all_actors(db, cursor, limit))
 
 @router.get("/actors/{actor_id}", dependencies=[Depends(require_role("admin"))])
 def get_actor(actor_id: int, db: Session = Depends(get_db)):
@@ -95,8 +134,8 @@ def delete_actor(actor_id: int, db: Session = Depends(get_db)):
 
 # Directors Management
 @router.get("/directors", dependencies=[Depends(require_role("admin"))])
-def get_all_directors(db: Session = Depends(get_db)):
-    return admin_crud.get_all_directors(db)
+def get_all_directors(response: Response, cursor: str | None = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), db: Session = Depends(get_db)):
+    return page(response, admin_crud.get_all_directors(db, cursor, limit))
 
 @router.get("/directors/{director_id}", dependencies=[Depends(require_role("admin"))])
 def get_director(director_id: int, db: Session = Depends(get_db)):
@@ -112,8 +151,8 @@ def delete_director(director_id: int, db: Session = Depends(get_db)):
 
 # Tickets Management
 @router.get("/tickets", dependencies=[Depends(require_role("admin"))])
-def get_all_tickets(db: Session = Depends(get_db)):
-    return admin_crud.get_all_tickets(db)
+def get_all_tickets(response: Response, cursor: str | None = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), db: Session = Depends(get_db)):
+    return page(response, admin_crud.get_all_tickets(db, cursor, limit))
 
 @router.get("/tickets/{ticket_no}", dependencies=[Depends(require_role("admin"))])
 def get_ticket(ticket_no: str, db: Session = Depends(get_db)):
@@ -126,3 +165,82 @@ def update_ticket(ticket_no: str, data: dict, db: Session = Depends(get_db)):
 @router.delete("/tickets/{ticket_no}", dependencies=[Depends(require_role("admin"))])
 def delete_ticket(ticket_no: str, db: Session = Depends(get_db)):
     return admin_crud.delete_ticket(ticket_no, db)
+
+# Full exports, streamed in chunks
+EXPORTS = {
+    "users": models.User,
+    "plays": models.Play,
+    "showtimes": models.ShowTime,
+    "customers": models.Customer,
+    "actors": models.Actor,
+    "directors": models.Director,
+    "tickets": models.Ticket,
+    "payments": models.Payment,
+    "addons": models.BookingAddon,
+}
+
+@router.get("/export/{entity}", dependencies=[Depends(require_role("admin"))])
+def export_entity(entity: str, format: str = Query("ndjson", pattern="^(ndjson|json)$")):
+    model = EXPORTS.get(entity)
+    if model is None:
+        raise HTTPException(status_code=404, detail="Unknown export")
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    return StreamingResponse(stream_rows(model, format, exclude=("hashed_password",)), media_type=media_type)
+
+# Columnar exports for analytics, incremental by rowid watermark
+COLUMNAR_EXPORTS = {
+    "tickets": models.Ticket,
+    "payments": models.Payment,
+    "addons": models.BookingAddon,
+    "showtimes": models.ShowTime,
+}
+
+@router.get("/export/{entity}/columnar", dependencies=[Depends(require_role("admin"))])
+def export_entity_columnar(
+    entity: str,
+    format: str = Query("npz", pattern="^(npz|arrow|parquet)$"),
+    since: int = Query(0, ge=0)
+):
+    model = COLUMNAR_EXPORTS.get(entity)
+    if model is None:
+        raise HTTPException(status_code=404, detail="Unknown export")
+    until = columnar.watermark(model, since)
+    return StreamingResponse(
+        columnar.export(model, format, since, until),
+        media_type=columnar.FORMATS[format],
+        headers={
+            columnar.WATERMARK_HEADER: str(until),
+            "Content-Disposition": f'attachment; filename="{entity}-{since}-{until}.{format}"',
+        },
+    )
+
+# Bulk imports; rejected rows are listed in the response, up to a limit
+MAX_REPORTED_ERRORS = 1000
+
+@router.post("/import/{entity}", dependencies=[Depends(require_role("admin"))])
+def import_entity(
+    entity: str,
+    file: UploadFile = File(...),
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    db: Session = Depends(get_db)
+):
+    if entity not in imports.IMPORTS:
+        raise HTTPException(status_code=404, detail="Unknown import")
+    errors = []
+
+    def collect(line_no, row, message):
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"line": line_no, "error": message, "row": row})
+
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    report = imports.import_rows(db, entity, imports.read_rows(stream, format), collect)
+    return {**report, "errors": errors, "errors_truncated": report["failed"] > len(errors)}
+
+# Set-based bulk changes: one statement per request, dry_run only counts
+@router.post("/bulk/{entity}/update", response_model=BulkResult, dependencies=[Depends(require_role("admin"))])
+def bulk_update(entity: str, data: BulkUpdate, db: Session = Depends(get_db)):
+    return bulk.bulk_update(db, entity, data.values, data.ids, data.where, data.dry_run)
+
+@router.post("/bulk/{entity}/delete", response_model=BulkResult, dependencies=[Depends(require_role("admin"))])
+def bulk_delete(entity: str, data: BulkDelete, db: Session = Depends(get_db)):
+    return bulk.bulk_delete(db, entity, data.ids, data.where, data.dry_run)
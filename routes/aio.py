@@ -0,0 +1,132 @@
+# routes/aio.py
+# ───────────────────────────────────────
+# async def versions of the hot public routes. main.py mounts this router in
+# front of the sync routers when USE_ASYNC_DB=1, so the same URLs can be
+# benchmarked in either mode; anything not listed here falls through to the
+# sync implementation. Reads share the sync routes' catalogue cache keys, so
+# both modes serve the same bodies, ETags and 304s. Ids are declared with the :int convertor so these
+# routes never capture literal sync paths such as /plays/full.
+from contextlib import ExitStack
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from schemas import Play, Actor, Director, ShowTime, Ticket, TicketCreate, TicketBatchCreate, Payment, PaymentCreate
+from crud import aio
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from catalogue import acached_response
+import waitingroom
+
+router = APIRouter()
+
+# ── plays
+@router.get("/plays/", response_model=list[Play], tags=["Plays"])
+async def get_all_plays(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await acached_response(request, "plays", (cursor, limit), Play,
+                                  lambda: aio.get_all_plays(db, cursor, limit))
+
+@router.get("/plays/{play_id:int}", response_model=Play, tags=["Plays"])
+async def get_play(play_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await acached_response(request, "plays", play_id, Play,
+                                  lambda: aio.get_play_by_id(db, play_id))
+
+# ── actors
+@router.get("/actors/", response_model=list[Actor], tags=["Actors"])
+async def get_actors(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await acached_response(request, "actors", (cursor, limit), Actor,
+                                  lambda: aio.get_actors(db, cursor, limit))
+
+@router.get("/actors/{actor_id:int}", response_model=Actor, tags=["Actors"])
+async def get_actor(actor_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def load():
+        actor = await aio.get_actor(db, actor_id)
+        if actor is None:
+            raise HTTPException(status_code=404, detail="Actor not found")
+        return actor
+    return await acached_response(request, "actors", actor_id, Actor, load)
+
+# ── directors
+@router.get("/directors/", response_model=list[Director], tags=["Directors"])
+async def get_directors(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await acached_response(request, "directors", (cursor, limit), Director,
+                                  lambda: aio.get_directors(db, cursor, limit))
+
+@router.get("/directors/{director_id:int}", response_model=Director, tags=["Directors"])
+async def get_director(director_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def load():
+        director = await aio.get_director(db, director_id)
+        if director is None:
+            raise HTTPException(status_code=404, detail="Director not found")
+        return director
+    return await acached_response(request, "directors", director_id, Director, load)
+
+# ── showtimes
+@router.get("/showtimes/", response_model=list[ShowTime], tags=["Showtimes"])
+async def get_showtimes(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await acached_response(request, "showtimes", (cursor, limit), ShowTime,
+                                  lambda: aio.get_showtimes(db, cursor, limit))
+
+@router.get("/showtimes/upcoming", response_model=list[ShowTime], tags=["Showtimes"])
+async def get_upcoming_showtimes(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    now = datetime.utcnow().replace(second=0, microsecond=0)
+    return await acached_response(request, "showtimes", ("upcoming", now, cursor, limit), ShowTime,
+                                  lambda: aio.get_upcoming_showtimes(db, now, cursor, limit))
+
+@router.get("/showtimes/by_play/{play_id:int}", response_model=list[ShowTime], tags=["Showtimes"])
+async def get_showtimes_by_play(play_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await acached_response(request, "showtimes", ("by_play", play_id), ShowTime,
+                                  lambda: aio.get_showtimes_by_play(db, play_id))
+
+@router.get("/showtimes/{play_id:int}/{date_time}/seats", tags=["Showtimes"])
+async def get_seat_availability(play_id: int, date_time: str, db: AsyncSession = Depends(get_async_db)):
+    return await aio.get_seat_grid(db, play_id, date_time)
+
+# ── bookings
+@router.post("/tickets/", response_model=Ticket, status_code=status.HTTP_201_CREATED, tags=["Tickets"])
+async def create_ticket(
+    data: TicketCreate,
+    queue_token: str | None = Header(None, alias=waitingroom.TOKEN_HEADER),
+    db: AsyncSession = Depends(get_async_db)
+):
+    with waitingroom.admission(data.ShowTime_Play_PlayId, data.ShowTime_DateAndTime, queue_token):
+        return await aio.create_ticket(db, data)
+
+@router.post("/tickets/batch", response_model=list[Ticket], status_code=status.HTTP_201_CREATED, tags=["Tickets"])
+async def create_tickets(
+    data: TicketBatchCreate,
+    queue_token: str | None = Header(None, alias=waitingroom.TOKEN_HEADER),
+    db: AsyncSession = Depends(get_async_db)
+):
+    with ExitStack() as admitted:
+        for play_id, date_time in {(t.ShowTime_Play_PlayId, t.ShowTime_DateAndTime) for t in data.tickets}:
+            admitted.enter_context(waitingroom.admission(play_id, date_time, queue_token))
+        return await aio.create_tickets(db, data.tickets)
+
+@router.post("/payments/", response_model=Payment, status_code=status.HTTP_201_CREATED, tags=["Payments"])
+async def create_payment(data: PaymentCreate, db: AsyncSession = Depends(get_async_db)):
+    return await aio.make_payment(db, data)
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from crud import customers
-from schemas import Customer, CustomerCreate
+from schemas import Customer, CustomerCreate, CustomerTicket
 from database import get_db
 from auth_utils import require_role
+from pagination import page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter()
 
@@ -13,10 +14,22 @@ def create_customer(customer: CustomerCreate, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=list[Customer], status_code=status.HTTP_200_OK)
 def get_customers(
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     _=Depends(require_role("admin"))
 ):
-    return customers.get_customers(db)
+    return page(response, customers.get_customers(db, cursor, limit))
+
+@router.get("/search", response_model=list[Customer], status_code=status.HTTP_200_OK)
+def search_customers(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=customers.MAX_SEARCH_RESULTS),
+    db: Session = Depends(get_db),
+    _=Depends(require_role("admin"))
+):
+    return customers.search_customers(db, q, limit)
 
 @router.get("/{customer_id}", response_model=Customer, status_code=status.HTTP_200_OK)
 def get_customer(
@@ -29,6 +42,17 @@ def get_customer(
         raise HTTPException(status_code=404, detail="Customer not found")
     return customer
 
+@router.get("/{customer_id}/tickets", response_model=list[CustomerTicket], status_code=status.HTTP_200_OK)
+def get_customer_tickets(
+    customer_id: int,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    _=Depends(require_role("admin"))
+):
+    return page(response, customers.get_customer_tickets(db, customer_id, cursor, limit))
+
 @router.delete("/{customer_id}", status_code=status.HTTP_200_OK)
 def delete_customer(
     customer_id: int,
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 from crud import directors
 from schemas import Director, DirectorCreate
 from database import get_db
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from catalogue import cached_response
 
 router = APIRouter()
 
@@ -11,15 +13,23 @@ def create_director(director: DirectorCreate, db: Session = Depends(get_db)):
     return directors.create_director(db, director)
 
 @router.get("/", response_model=list[Director], status_code=status.HTTP_200_OK)
-def get_directors(db: Session = Depends(get_db)):
-    return directors.get_directors(db)
+def get_directors(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    return cached_response(request, "directors", (cursor, limit), Director,
+                           lambda: directors.get_directors(db, cursor, limit))
 
 @router.get("/{director_id}", response_model=Director, status_code=status.HTTP_200_OK)
-def get_director(director_id: int, db: Session = Depends(get_db)):
-    director = directors.get_director(db, director_id)
-    if director is None:
-        raise HTTPException(status_code=404, detail="Director not found")
-    return director
+def get_director(director_id: int, request: Request, db: Session = Depends(get_db)):
+    def load():
+        director = directors.get_director(db, director_id)
+        if director is None:
+            raise HTTPException(status_code=404, detail="Director not found")
+        return director
+    return cached_response(request, "directors", director_id, Director, load)
 
 @router.delete("/{director_id}", status_code=status.HTTP_200_OK)
 def delete_director(director_id: int, db: Session = Depends(get_db)):
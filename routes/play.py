@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 from database import get_db
-from schemas import Play, PlayCreate, PlayUpdate
+from schemas import Play, PlayCreate, PlayUpdate, PlayFull
 from crud import plays
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from catalogue import cached_response
 
 router = APIRouter()
 
@@ -11,15 +13,27 @@ def create_play(play: PlayCreate, db: Session = Depends(get_db)):
     return plays.create_play(db, play)
 
 @router.get("/", response_model=list[Play])
-def get_all_plays(db: Session = Depends(get_db)):
-    return plays.get_all_plays(db)
+def get_all_plays(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    return cached_response(request, "plays", (cursor, limit), Play,
+                           lambda: plays.get_all_plays(db, cursor, limit))
+
+@router.get("/full", response_model=list[PlayFull])
+def get_plays_full(ids: list[int] = Query(..., max_length=plays.MAX_FULL_PLAYS), db: Session = Depends(get_db)):
+    return plays.get_plays_full(db, ids)
+
+@router.get("/{play_id}/full", response_model=PlayFull)
+def get_play_full(play_id: int, db: Session = Depends(get_db)):
+    return plays.get_play_full(db, play_id)
 
 @router.get("/{play_id}", response_model=Play)
-def get_play(play_id: int, db: Session = Depends(get_db)):
-    play = plays.get_play_by_id(db, play_id)
-    if not play:
-        raise HTTPException(status_code=404, detail="Play not found")
-    return play
+def get_play(play_id: int, request: Request, db: Session = Depends(get_db)):
+    return cached_response(request, "plays", play_id, Play,
+                           lambda: plays.get_play_by_id(db, play_id))
 
 @router.put("/{play_id}", response_model=Play)
 def update_play(play_id: int, update: PlayUpdate, db: Session = Depends(get_db)):
@@ -0,0 +1,18 @@
+from datetime import datetime
+from fastapi import APIRouter, Header, status
+from schemas import QueuePosition, QueueTicket
+import waitingroom
+
+router = APIRouter()
+
+@router.post("/{play_id}/{date_time}", response_model=QueueTicket, status_code=status.HTTP_201_CREATED)
+def join_queue(play_id: int, date_time: datetime):
+    return waitingroom.join(play_id, date_time)
+
+@router.get("/{play_id}/{date_time}", response_model=QueuePosition)
+def queue_position(
+    play_id: int,
+    date_time: datetime,
+    queue_token: str = Header(..., alias=waitingroom.TOKEN_HEADER)
+):
+    return waitingroom.status(play_id, date_time, queue_token)
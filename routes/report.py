@@ -0,0 +1,34 @@
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from crud import reports
+from schemas import PlayRevenue, DayRevenue, MethodRevenue, ShowTimeOccupancy, AddonUptake
+from database import get_db
+from auth_utils import require_role
+
+router = APIRouter(dependencies=[Depends(require_role("admin"))])
+
+def date_range(start: date | None = None, end: date | None = None):
+    if start and end and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    return start, end
+
+@router.get("/revenue/by_play", response_model=list[PlayRevenue])
+def revenue_by_play(window: tuple = Depends(date_range), db: Session = Depends(get_db)):
+    return reports.revenue_by_play(db, *window)
+
+@router.get("/revenue/by_day", response_model=list[DayRevenue])
+def revenue_by_day(play_id: int | None = None, window: tuple = Depends(date_range), db: Session = Depends(get_db)):
+    return reports.revenue_by_day(db, *window, play_id)
+
+@router.get("/revenue/by_method", response_model=list[MethodRevenue])
+def revenue_by_method(play_id: int | None = None, window: tuple = Depends(date_range), db: Session = Depends(get_db)):
+    return reports.revenue_by_method(db, *window, play_id)
+
+@router.get("/occupancy", response_model=list[ShowTimeOccupancy])
+def occupancy(play_id: int | None = None, window: tuple = Depends(date_range), db: Session = Depends(get_db)):
+    return reports.occupancy(db, *window, play_id)
+
+@router.get("/addons", response_model=list[AddonUptake])
+def addon_uptake(play_id: int | None = None, window: tuple = Depends(date_range), db: Session = Depends(get_db)):
+    return reports.addon_uptake(db, *window, play_id)
@@ -0,0 +1,20 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
+from database import get_db
+from schemas import SearchResult
+from crud import search
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, page
+
+router = APIRouter()
+
+@router.get("/", response_model=list[SearchResult])
+def search_catalogue(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Literal["play", "actor", "director"] | None = None,
+    cursor: str | None = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    return page(response, search.search(db, q, type, cursor, limit))
@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 from crud import showtimes
 from schemas import ShowTime, ShowTimeCreate
 from database import get_db
 from auth_utils import require_role
-from datetime import datetime
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from catalogue import cached_response
+from datetime import datetime, timezone
 
 router = APIRouter()
 
+def _naive_utc(value: datetime):
+    # showtimes are stored as naive UTC; shift offset-aware bounds onto that clock
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
 @router.post("/", response_model=ShowTime, status_code=status.HTTP_201_CREATED)
 def create_showtime(
     showtime: ShowTimeCreate,
@@ -17,17 +25,52 @@ def create_showtime(
     return showtimes.create_showtime(db, showtime)
 
 @router.get("/", response_model=list[ShowTime], status_code=status.HTTP_200_OK)
-def get_showtimes(db: Session = Depends(get_db)):
-    return showtimes.get_showtimes(db)
+def get_showtimes(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    return cached_response(request, "showtimes", (cursor, limit), ShowTime,
+                           lambda: showtimes.get_showtimes(db, cursor, limit))
 
 @router.get("/upcoming", response_model=list[ShowTime])
-def get_upcoming_showtimes(db: Session = Depends(get_db)):
-    now = datetime.utcnow()
-    return showtimes.get_upcoming_showtimes(db, now)
+def get_upcoming_showtimes(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    # cached per minute, so a showtime drops off at most a minute late
+    now = datetime.utcnow().replace(second=0, microsecond=0)
+    return cached_response(request, "showtimes", ("upcoming", now, cursor, limit), ShowTime,
+                           lambda: showtimes.get_upcoming_showtimes(db, now, cursor, limit))
+
+@router.get("/range", response_model=list[ShowTime])
+def get_showtimes_in_range(
+    request: Request,
+    start: datetime,
+    end: datetime | None = None,
+    play_id: int | None = None,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    start = _naive_utc(start)
+    end = _naive_utc(end) if end else None
+    if end is not None and end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    return cached_response(request, "showtimes", ("range", start, end, play_id, cursor, limit), ShowTime,
+                           lambda: showtimes.get_showtimes_in_range(db, start, end, play_id, cursor, limit))
 
 @router.get("/by_play/{play_id}", response_model=list[ShowTime])
-def get_showtimes_by_play(play_id: int, db: Session = Depends(get_db)):
-    return showtimes.get_showtimes_by_play(db, play_id)
+def get_showtimes_by_play(play_id: int, request: Request, db: Session = Depends(get_db)):
+    return cached_response(request, "showtimes", ("by_play", play_id), ShowTime,
+                           lambda: showtimes.get_showtimes_by_play(db, play_id))
+
+@router.get("/{play_id}/{date_time}/seats")
+def get_seat_availability(play_id: int, date_time: str, db: Session = Depends(get_db)):
+    return showtimes.get_seat_grid(db, play_id, date_time)
 
 @router.put("/{play_id}/{date_time}", response_model=ShowTime)
 def update_showtime(
@@ -1,23 +1,62 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from contextlib import ExitStack
+from fastapi import APIRouter, Depends, Header, status, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from database import get_db
-from schemas import Ticket, TicketCreate
+from schemas import Ticket, TicketCreate, TicketBatchCreate, SeatHold, SeatHoldCreate, SeatHoldConfirm
 from crud import tickets
-from auth_utils import get_current_user, require_role
-from models import User
+from auth_utils import CurrentUser, get_current_user, require_role
+from pagination import page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+import waitingroom
 
 router = APIRouter()
 
+# Bookings for a showtime with an open waiting room each spend one admitted queue token
+QueueToken = Header(None, alias=waitingroom.TOKEN_HEADER)
+
 @router.post("/", response_model=Ticket, status_code=status.HTTP_201_CREATED)
-def create_ticket(data: TicketCreate, db: Session = Depends(get_db)):
-    return tickets.create_ticket(db, data)
+def create_ticket(data: TicketCreate, queue_token: str | None = QueueToken, db: Session = Depends(get_db)):
+    with waitingroom.admission(data.ShowTime_Play_PlayId, data.ShowTime_DateAndTime, queue_token):
+        return tickets.create_ticket(db, data)
+
+@router.post("/batch", response_model=list[Ticket], status_code=status.HTTP_201_CREATED)
+def create_tickets(data: TicketBatchCreate, queue_token: str | None = QueueToken, db: Session = Depends(get_db)):
+    with ExitStack() as admitted:
+        for play_id, date_time in {(t.ShowTime_Play_PlayId, t.ShowTime_DateAndTime) for t in data.tickets}:
+            admitted.enter_context(waitingroom.admission(play_id, date_time, queue_token))
+        return tickets.create_tickets(db, data.tickets)
+
+@router.post("/holds", response_model=SeatHold, status_code=status.HTTP_201_CREATED)
+def hold_seats(
+    data: SeatHoldCreate,
+    queue_token: str | None = QueueToken,
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    with waitingroom.admission(data.ShowTime_Play_PlayId, data.ShowTime_DateAndTime, queue_token):
+        return tickets.hold_seats(db, data, user)
+
+@router.post("/holds/{hold_id}/confirm", response_model=list[Ticket], status_code=status.HTTP_201_CREATED)
+def confirm_hold(
+    hold_id: str,
+    data: SeatHoldConfirm,
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    return tickets.confirm_hold(db, hold_id, data, user)
+
+@router.delete("/holds/{hold_id}", status_code=status.HTTP_200_OK)
+def cancel_hold(hold_id: str, user: CurrentUser = Depends(get_current_user)):
+    return tickets.cancel_hold(hold_id, user)
 
 @router.get("/", response_model=list[Ticket])
 def get_all_tickets(
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     _ = Depends(require_role("admin"))
 ):
-    return tickets.get_all_tickets(db)
+    return page(response, tickets.get_all_tickets(db, cursor, limit))
 
 @router.get("/{ticket_no}", response_model=Ticket)
 def get_ticket(
@@ -34,19 +73,8 @@ def get_ticket(
 def cancel_ticket(
     ticket_no: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    _ = Depends(require_role("admin"))
 ):
-    ticket = tickets.get_ticket_by_number(db, ticket_no)
-    if not ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
-
-    # Check if the ticket belongs to the logged-in user
-    customer = db.query(models.Customer).filter(models.Customer.Email == current_user.email).first()
-    if not customer or ticket.Customer_CustomerId != customer.CustomerId:
-        raise HTTPException(status_code=403, detail="You are not authorized to cancel this ticket")
-
-    result = tickets.cancel_ticket(db, ticket_no)
-    if not result:
-        raise HTTPException(status_code=400, detail="Cancellation failed")
-
-    return {"message": "Ticket cancelled successfully"}
+    # Customers have no login of their own, so cancellations go through the
+    # box office: nothing links a user account to the customer on a ticket
+    return tickets.delete_ticket(db, ticket_no)
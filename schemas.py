@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, EmailStr, Field
+from typing import Any, Literal, Optional
+from datetime import date, datetime
 
 
 
@@ -9,6 +9,14 @@ class UserBase(BaseModel):
     email: EmailStr
 
 
+class User(UserBase):
+    id: int
+    role: str
+
+    class Config:
+        orm_mode = True
+
+
 class UserCreate(BaseModel):
     username: str
     email: EmailStr
@@ -116,11 +124,17 @@ class ShowTime(ShowTimeBase):
     class Config:
         orm_mode = True
 
+# Play with its cast, directors and upcoming showtimes
+class PlayFull(Play):
+    actors: list[Actor] = []
+    directors: list[Director] = []
+    showtimes: list[ShowTime] = []
+
 # Ticket
 class TicketBase(BaseModel):
     TicketNo: str
-    Seat_RowNo: int
-    Seat_SeatNo: int
+    Seat_RowNo: int = Field(..., ge=0)
+    Seat_SeatNo: int = Field(..., ge=0, le=4096)
     ShowTime_DateAndTime: datetime
     ShowTime_Play_PlayId: int
     Customer_CustomerId: int
@@ -132,6 +146,63 @@ class Ticket(TicketBase):
     class Config:
         orm_mode = True
 
+# A customer's ticket with its play, payment and add-ons
+class CustomerTicket(BaseModel):
+    TicketNo: str
+    Seat_RowNo: int
+    Seat_SeatNo: int
+    ShowTime_DateAndTime: datetime
+    ShowTime_Play_PlayId: int
+    Title: Optional[str] = None
+    payment_status: Optional[str] = None
+    amount: Optional[float] = None
+    payment_method: Optional[str] = None
+    food: Optional[str] = None
+    drinks: Optional[str] = None
+    flowers: Optional[bool] = None
+
+    class Config:
+        orm_mode = True
+
+class TicketBatchCreate(BaseModel):
+    tickets: list[TicketCreate]
+
+# Seat holds
+MAX_HOLD_SEATS = 20
+
+class SeatRef(BaseModel):
+    Seat_RowNo: int = Field(..., ge=0)
+    Seat_SeatNo: int = Field(..., ge=0, le=4096)
+
+class SeatHoldCreate(BaseModel):
+    ShowTime_DateAndTime: datetime
+    ShowTime_Play_PlayId: int
+    Customer_CustomerId: int
+    seats: list[SeatRef] = Field(..., min_length=1, max_length=MAX_HOLD_SEATS)
+
+class SeatHold(SeatHoldCreate):
+    hold_id: str
+    expires_at: datetime
+
+# Waiting room
+class QueuePosition(BaseModel):
+    admitted: bool
+    position: int
+    eta_seconds: Optional[float] = None
+
+class QueueTicket(QueuePosition):
+    token: str
+
+class WaitingRoomConfig(BaseModel):
+    # admissions per second; 0 pauses admission
+    rate: Optional[float] = Field(None, ge=0)
+
+class SeatHoldConfirm(BaseModel):
+    payment_method: str
+    amount: float = Field(..., ge=0)
+    # one per held seat, in order; generated when left out
+    TicketNos: Optional[list[str]] = None
+
 # BookingAddon
 class BookingAddonBase(BaseModel):
     TicketNo: str
@@ -165,3 +236,73 @@ class PaymentCreate(PaymentBase):
 class Payment(PaymentBase):
     class Config:
         orm_mode = True
+
+# Sales counters
+class ShowTimeSales(BaseModel):
+    ShowTime_Play_PlayId: int
+    ShowTime_DateAndTime: datetime
+    seats_sold: int
+    seats_remaining: int
+    tickets_paid: int
+    gross_revenue: float
+    addons_food: int
+    addons_drinks: int
+    addons_flowers: int
+
+# Reports
+class PlayRevenue(BaseModel):
+    Play_PlayId: int
+    Title: Optional[str] = None
+    tickets_paid: int
+    gross_revenue: float
+
+class DayRevenue(BaseModel):
+    day: date
+    tickets_paid: int
+    gross_revenue: float
+
+class MethodRevenue(BaseModel):
+    payment_method: str
+    tickets_paid: int
+    gross_revenue: float
+
+class ShowTimeOccupancy(BaseModel):
+    Play_PlayId: int
+    DateAndTime: datetime
+    seats_sold: int
+    capacity: int
+    occupancy: float
+
+class AddonUptake(BaseModel):
+    Play_PlayId: int
+    Title: Optional[str] = None
+    seats_sold: int
+    food: int
+    drinks: int
+    flowers: int
+    food_rate: float
+    drinks_rate: float
+    flowers_rate: float
+
+# Bulk admin mutations
+class BulkDelete(BaseModel):
+    ids: Optional[list[Any]] = None
+    where: dict[str, Any] = {}
+    dry_run: bool = False
+
+class BulkUpdate(BulkDelete):
+    values: dict[str, Any]
+
+class BulkResult(BaseModel):
+    entity: str
+    matched: int
+    dry_run: bool
+    cascaded: dict[str, int] = {}
+
+# Full-text search
+class SearchResult(BaseModel):
+    type: Literal["play", "actor", "director"]
+    id: int
+    play_id: Optional[int] = None
+    name: Optional[str] = None
+    score: float
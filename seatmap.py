@@ -0,0 +1,368 @@
+# seatmap.py
+# ───────────────────────────────────────
+# In-memory seat occupancy per showtime.
+#
+# Every showtime keeps one integer bitmask per row (bit N set = seat N sold).
+# A showtime is loaded once from the tickets seat index and afterwards kept
+# current by the ticket write paths, so most "is this seat free?" checks never
+# reach SQLite. The unique index on tickets is still the source of truth: the
+# bitmap only serialises claims inside this process.
+#
+# Seats can also be held for a while during checkout. A hold sets the same
+# bits as a sale, so nobody else can take the seat, and is kept in a hold
+# table with an expiry heap; a background sweeper releases expired holds in
+# batches. Like the bitmap, holds live in this process only. Each customer
+# and each signed-in holder may keep only a few live holds per showtime, so
+# nobody can sit on a block of seats by holding them over and over.
+import base64
+import heapq
+import os
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy.orm import Session
+from models import Ticket
+
+# Hall layout used for the availability grid; rows and seats are numbered from 1
+VENUE_ROWS = int(os.getenv("VENUE_ROWS", "20"))
+VENUE_SEATS_PER_ROW = int(os.getenv("VENUE_SEATS_PER_ROW", "30"))
+
+HOLD_TTL = float(os.getenv("SEAT_HOLD_TTL", "600"))
+HOLD_SWEEP_INTERVAL = float(os.getenv("SEAT_HOLD_SWEEP_INTERVAL", "5"))
+HOLD_SWEEP_BATCH = 1000
+HOLDS_PER_SHOWTIME = int(os.getenv("SEAT_HOLDS_PER_SHOWTIME", "1"))
+
+_lock = threading.Lock()
+_showtimes: dict[tuple[int, datetime], dict[int, int]] = {}
+# encoded availability grids, dropped whenever the showtime's seats change
+_grids: dict[tuple[int, datetime], dict] = {}
+
+
+@dataclass(frozen=True)
+class Hold:
+    hold_id: str
+    play_id: int
+    date_time: datetime
+    seats: tuple[tuple[int, int], ...]
+    customer_id: int
+    expires_at: float
+    # id of the user who placed the hold
+    holder: int | None = None
+
+
+class HoldLimitReached(Exception):
+    pass
+
+
+_holds: dict[str, Hold] = {}
+# live hold ids per showtime, so a reloaded map keeps its held seats
+_held: dict[tuple[int, datetime], set[str]] = {}
+# (expires_at, hold_id); entries for holds already gone are skipped
+_expiry: list[tuple[float, str]] = []
+
+
+def _key(play_id: int, date_time: datetime):
+    # SQLite stores naive timestamps, so compare on the naive wall-clock value
+    return (play_id, date_time.replace(tzinfo=None))
+
+
+def _load(db: Session, key):
+    play_id, date_time = key
+    rows: dict[int, int] = {}
+    sold = db.query(Ticket.Seat_RowNo, Ticket.Seat_SeatNo).filter(
+        Ticket.ShowTime_DateAndTime == date_time,
+        Ticket.ShowTime_Play_PlayId == play_id
+    )
+    for row_no, seat_no in sold:
+        rows[row_no] = rows.get(row_no, 0) | (1 << seat_no)
+    return rows
+
+
+def _rows(db: Session, key):
+    rows = _showtimes.get(key)
+    if rows is None:
+        loaded = _load(db, key)
+        with _lock:
+            for hold_id in _held.get(key, ()):
+                _set(loaded, _holds[hold_id].seats)
+            rows = _showtimes.setdefault(key, loaded)
+    return rows
+
+
+def _set(rows: dict, seats):
+    for row_no, seat_no in seats:
+        rows[row_no] = rows.get(row_no, 0) | (1 << seat_no)
+
+
+def _clear(key, seats):
+    # caller holds _lock
+    _grids.pop(key, None)
+    rows = _showtimes.get(key)
+    if rows is None:
+        return
+    for row_no, seat_no in seats:
+        remaining = rows.get(row_no, 0) & ~(1 << seat_no)
+        if remaining:
+            rows[row_no] = remaining
+        else:
+            rows.pop(row_no, None)
+
+
+def is_taken(db: Session, play_id: int, date_time: datetime, row_no: int, seat_no: int):
+    rows = _rows(db, _key(play_id, date_time))
+    return bool(rows.get(row_no, 0) & (1 << seat_no))
+
+
+def claim(db: Session, play_id: int, date_time: datetime, row_no: int, seat_no: int):
+    """Mark a seat as sold. Returns False if it is already taken."""
+    key = _key(play_id, date_time)
+    rows = _rows(db, key)
+    bit = 1 << seat_no
+    with _lock:
+        taken = rows.get(row_no, 0)
+        if taken & bit:
+            return False
+        rows[row_no] = taken | bit
+        _grids.pop(key, None)
+    return True
+
+
+def claim_many(db: Session, play_id: int, date_time: datetime, seats):
+    """Mark several (row, seat) pairs as sold, all or nothing.
+
+    Returns the pairs that were already taken; nothing is claimed unless
+    that list is empty.
+    """
+    key = _key(play_id, date_time)
+    rows = _rows(db, key)
+    with _lock:
+        taken = [
+            (row_no, seat_no) for row_no, seat_no in seats
+            if rows.get(row_no, 0) & (1 << seat_no)
+        ]
+        if not taken:
+            _set(rows, seats)
+            _grids.pop(key, None)
+    return taken
+
+
+def release(play_id: int, date_time: datetime, row_no: int, seat_no: int):
+    with _lock:
+        _clear(_key(play_id, date_time), [(row_no, seat_no)])
+
+
+# Holds
+
+def _hold_count(key, customer_id: int, holder: int | None):
+    # caller holds _lock; live holds on this showtime for either party
+    now, counts = time.time(), [0, 0]
+    for hold_id in _held.get(key, ()):
+        entry = _holds[hold_id]
+        if entry.expires_at <= now:
+            continue
+        counts[0] += entry.customer_id == customer_id
+        counts[1] += holder is not None and entry.holder == holder
+    return counts
+
+
+def hold(db: Session, play_id: int, date_time: datetime, seats, customer_id: int,
+         ttl: float = HOLD_TTL, holder: int | None = None, limit: int | None = HOLDS_PER_SHOWTIME):
+    """Hold (row, seat) pairs for `ttl` seconds, all or nothing.
+
+    Returns (hold, taken): the new Hold, or None plus the pairs that were
+    already sold or held. Raises HoldLimitReached if the customer, or the
+    holder, already has `limit` live holds on the showtime (None: no limit;
+    pass holder=None to count the customer only).
+    """
+    key = _key(play_id, date_time)
+    seats = tuple(seats)
+    if limit is not None:
+        with _lock:
+            if max(_hold_count(key, customer_id, holder)) >= limit:
+                raise HoldLimitReached
+    taken = claim_many(db, play_id, date_time, seats)
+    if taken:
+        return None, taken
+    entry = Hold(secrets.token_urlsafe(16), play_id, key[1], seats, customer_id, time.time() + ttl, holder)
+    with _lock:
+        # checked again: a concurrent hold may have landed since
+        if limit is not None and max(_hold_count(key, customer_id, holder)) >= limit:
+            _clear(key, seats)
+            raise HoldLimitReached
+        _holds[entry.hold_id] = entry
+        _held.setdefault(key, set()).add(entry.hold_id)
+        heapq.heappush(_expiry, (entry.expires_at, entry.hold_id))
+    return entry, []
+
+
+def get_hold(hold_id: str):
+    """The live hold with this id, or None."""
+    with _lock:
+        entry = _holds.get(hold_id)
+    if entry is None or entry.expires_at <= time.time():
+        return None
+    return entry
+
+
+def _drop(entry: Hold):
+    # caller holds _lock
+    key = _key(entry.play_id, entry.date_time)
+    del _holds[entry.hold_id]
+    ids = _held.get(key)
+    if ids is not None:
+        ids.discard(entry.hold_id)
+        if not ids:
+            del _held[key]
+
+
+def take_hold(hold_id: str):
+    """Remove a live hold and return it, leaving its seats claimed.
+
+    Used to confirm a hold; returns None if it is unknown or has expired.
+    """
+    with _lock:
+        entry = _holds.get(hold_id)
+        if entry is None:
+            return None
+        _drop(entry)
+        if entry.expires_at <= time.time():
+            _clear(_key(entry.play_id, entry.date_time), entry.seats)
+            return None
+    return entry
+
+
+def restore_hold(entry: Hold):
+    # put back a hold whose confirmation failed, unless it ran out meanwhile
+    with _lock:
+        if entry.expires_at > time.time():
+            _holds[entry.hold_id] = entry
+            _held.setdefault(_key(entry.play_id, entry.date_time), set()).add(entry.hold_id)
+            # the sweeper may have dropped its heap entry while it was out
+            heapq.heappush(_expiry, (entry.expires_at, entry.hold_id))
+        else:
+            _clear(_key(entry.play_id, entry.date_time), entry.seats)
+
+
+def cancel_hold(hold_id: str):
+    with _lock:
+        entry = _holds.get(hold_id)
+        if entry is None:
+            return False
+        _drop(entry)
+        _clear(_key(entry.play_id, entry.date_time), entry.seats)
+    return True
+
+
+def sweep_holds(now: float | None = None, batch: int = HOLD_SWEEP_BATCH):
+    """Release every expired hold, `batch` at a time. Returns how many."""
+    now = time.time() if now is None else now
+    released = 0
+    while True:
+        with _lock:
+            done = 0
+            while _expiry and _expiry[0][0] <= now and done < batch:
+                _, hold_id = heapq.heappop(_expiry)
+                done += 1
+                entry = _holds.get(hold_id)
+                if entry is None or entry.expires_at > now:
+                    continue
+                _drop(entry)
+                _clear(_key(entry.play_id, entry.date_time), entry.seats)
+                released += 1
+            more = bool(_expiry) and _expiry[0][0] <= now
+        if not more:
+            return released
+
+
+def live_holds():
+    return len(_holds)
+
+
+_sweeper: threading.Thread | None = None
+_stop = threading.Event()
+
+
+def _sweep_forever():
+    while not _stop.wait(HOLD_SWEEP_INTERVAL):
+        sweep_holds()
+
+
+def start_sweeper():
+    global _sweeper
+    if _sweeper is None or not _sweeper.is_alive():
+        _stop.clear()
+        _sweeper = threading.Thread(target=_sweep_forever, name="seat-hold-sweeper", daemon=True)
+        _sweeper.start()
+
+
+def stop_sweeper():
+    _stop.set()
+
+
+def invalidate(play_id: int, date_time: datetime):
+    # Drop the cached map; it is reloaded from the index on next use
+    key = _key(play_id, date_time)
+    with _lock:
+        _showtimes.pop(key, None)
+        _grids.pop(key, None)
+
+
+def clear():
+    with _lock:
+        _showtimes.clear()
+        _grids.clear()
+        _holds.clear()
+        _held.clear()
+        _expiry.clear()
+
+
+def is_loaded(play_id: int, date_time: datetime):
+    return _key(play_id, date_time) in _showtimes
+
+
+def grid(db: Session, play_id: int, date_time: datetime):
+    """Occupancy grid for a showtime as a row-major bitset.
+
+    Bit (row - 1) * seats_per_row + (seat - 1) is set when the seat is sold;
+    the bitset is little-endian (bit 0 is the lowest bit of the first byte)
+    and base64 encoded. The grid is rebuilt only after the seats change.
+    """
+    key = _key(play_id, date_time)
+    cached = _grids.get(key)
+    if cached is not None:
+        return cached
+
+    rows = _rows(db, key)
+    with _lock:
+        snapshot = dict(rows)
+    n_rows = max([VENUE_ROWS, *snapshot])
+    n_seats = max([VENUE_SEATS_PER_ROW, *(mask.bit_length() - 1 for mask in snapshot.values())])
+    row_mask = (1 << n_seats) - 1
+    bits = 0
+    sold = 0
+    for row_no, mask in snapshot.items():
+        if row_no < 1:
+            continue
+        # seat N lives in bit N of the row mask; shift so seat 1 is bit 0
+        seats = (mask >> 1) & row_mask
+        sold += seats.bit_count()
+        bits |= seats << ((row_no - 1) * n_seats)
+
+    size = n_rows * n_seats
+    payload = {
+        "play_id": play_id,
+        "date_time": key[1].isoformat(),
+        "rows": n_rows,
+        "seats_per_row": n_seats,
+        "sold": sold,
+        "available": size - sold,
+        "encoding": "bitset-le-base64",
+        "grid": base64.b64encode(bits.to_bytes((size + 7) // 8, "little")).decode(),
+    }
+    with _lock:
+        # only publish if nothing changed while we were encoding
+        if _showtimes.get(key) is rows and rows == snapshot:
+            _grids[key] = payload
+    return payload
@@ -0,0 +1,220 @@
+# waitingroom.py
+# ───────────────────────────────────────
+# Waiting room for high-demand on-sales.
+#
+# An admin opens a waiting room for a showtime with an admit rate (buyers
+# per second). Buyers join a FIFO virtual queue and get a signed token
+# carrying their place in line; an admission cursor advances at the admit
+# rate, and a token whose place is behind the cursor is admitted. Booking
+# routes for that showtime then require an admitted token, so writes arrive
+# at the configured rate instead of all at once.
+#
+# An admission is good for one booking (a ticket, a batch or a seat hold):
+# the booking consumes it, and gets it back only if the booking fails, so a
+# shared or replayed token can't book past the admit rate. Tokens are signed
+# with a nonce drawn when the room opens, so reopening a room voids them.
+#
+# A room is a joined counter and a cursor, advanced lazily when touched, a
+# log of when the cursor moved and the places already used. A token stays
+# admitted for ADMISSION_TTL seconds of wall-clock time after the cursor
+# passed it, whatever the rate does meanwhile, so pausing a room (rate 0)
+# stops new admissions without evicting buyers mid-checkout. Rooms live in
+# this process only, so with several workers each admits at the full rate.
+import bisect
+import hashlib
+import hmac
+import math
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from fastapi import HTTPException
+from auth_utils import SECRET_KEY
+
+DEFAULT_ADMIT_RATE = float(os.getenv("WAITING_ROOM_RATE", "20"))
+ADMISSION_TTL = float(os.getenv("WAITING_ROOM_ADMISSION_TTL", "300"))
+TOKEN_HEADER = "X-Queue-Token"
+
+
+@dataclass
+class _Room:
+    rate: float
+    joined: int = 0
+    admitted: float = 0.0
+    last: float = field(default_factory=time.monotonic)
+    # when the cursor moved: floors[i] buyers were admitted by times[i]
+    floors: list = field(default_factory=list)
+    times: list = field(default_factory=list)
+    # tokens below this place were admitted more than ADMISSION_TTL ago
+    lapsed: int = 0
+    # admitted places consumed by a booking, from `lapsed` up
+    used: set = field(default_factory=set)
+    nonce: str = field(default_factory=lambda: secrets.token_hex(8))
+
+    def advance(self):
+        # admit at `rate` per second, but never bank admissions while the
+        # queue is empty
+        now = time.monotonic()
+        front = math.floor(self.admitted)
+        self.admitted = min(float(self.joined), self.admitted + self.rate * (now - self.last))
+        self.last = now
+        if math.floor(self.admitted) > front:
+            self.floors.append(math.floor(self.admitted))
+            self.times.append(now)
+        stale = bisect.bisect_left(self.times, now - ADMISSION_TTL)
+        if stale:
+            self.lapsed = self.floors[stale - 1]
+            del self.floors[:stale], self.times[:stale]
+            self.used = {seq for seq in self.used if seq >= self.lapsed}
+
+
+_lock = threading.Lock()
+_rooms: dict[tuple[int, datetime], _Room] = {}
+
+
+def _key(play_id: int, date_time: datetime):
+    return (play_id, date_time.replace(tzinfo=None))
+
+
+def _sign(key, room: _Room, seq: int):
+    message = f"{key[0]}|{key[1].isoformat()}|{room.nonce}|{seq}".encode()
+    return hmac.new(SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()[:20]
+
+
+def _seq(key, room: _Room, token: str | None):
+    # the place in line a token was issued for, or None if it isn't valid here
+    if not token:
+        return None
+    seq, _, signature = token.partition(".")
+    if not seq.isdigit() or not hmac.compare_digest(signature, _sign(key, room, int(seq))):
+        return None
+    return int(seq)
+
+
+def _state(room: _Room, seq: int):
+    front = math.floor(room.admitted)
+    if seq < front:
+        return {"admitted": True, "position": 0, "eta_seconds": 0.0}
+    eta = (seq + 1 - room.admitted) / room.rate if room.rate > 0 else None
+    return {"admitted": False, "position": seq - front + 1, "eta_seconds": eta}
+
+
+def _room(key):
+    room = _rooms.get(key)
+    if room is None:
+        raise HTTPException(status_code=404, detail="No waiting room for this showtime")
+    return room
+
+
+def open_room(play_id: int, date_time: datetime, rate: float | None = None):
+    """Open a waiting room, or change the admit rate of an open one."""
+    key = _key(play_id, date_time)
+    with _lock:
+        room = _rooms.get(key)
+        if room is None:
+            room = _rooms[key] = _Room(DEFAULT_ADMIT_RATE if rate is None else rate)
+        else:
+            room.advance()
+            if rate is not None:
+                room.rate = rate
+        return _stats(key, room)
+
+
+def close_room(play_id: int, date_time: datetime):
+    with _lock:
+        return _rooms.pop(_key(play_id, date_time), None) is not None
+
+
+def is_open(play_id: int, date_time: datetime):
+    return _key(play_id, date_time) in _rooms
+
+
+def _stats(key, room: _Room):
+    return {
+        "play_id": key[0],
+        "date_time": key[1],
+        "rate": room.rate,
+        "joined": room.joined,
+        "admitted": math.floor(room.admitted),
+        "waiting": room.joined - math.floor(room.admitted),
+    }
+
+
+def stats(play_id: int, date_time: datetime):
+    key = _key(play_id, date_time)
+    with _lock:
+        room = _room(key)
+        room.advance()
+        return _stats(key, room)
+
+
+def join(play_id: int, date_time: datetime):
+    key = _key(play_id, date_time)
+    with _lock:
+        room = _room(key)
+        room.advance()
+        seq = room.joined
+        room.joined += 1
+        state = _state(room, seq)
+    return {"token": f"{seq}.{_sign(key, room, seq)}", **state}
+
+
+def status(play_id: int, date_time: datetime, token: str):
+    key = _key(play_id, date_time)
+    with _lock:
+        room = _room(key)
+        seq = _seq(key, room, token)
+        if seq is None:
+            raise HTTPException(status_code=400, detail="Invalid queue token")
+        room.advance()
+        return _state(room, seq)
+
+
+def _admit(key, token: str | None):
+    # consume the token's admission; returns the room and place, or None
+    # when the showtime has no waiting room
+    with _lock:
+        room = _rooms.get(key)
+        if room is None:
+            return None
+        seq = _seq(key, room, token)
+        room.advance()
+        if seq is None:
+            detail, retry = "Waiting room is open for this showtime; join the queue first.", 1
+        else:
+            state = _state(room, seq)
+            if state["admitted"]:
+                if seq < room.lapsed:
+                    detail, retry = "Admission expired; join the queue again.", 1
+                elif seq in room.used:
+                    detail, retry = "Queue token already used for a booking; join the queue again.", 1
+                else:
+                    room.used.add(seq)
+                    return room, seq
+            else:
+                detail = {"message": "Not admitted yet.", "position": state["position"],
+                          "eta_seconds": state["eta_seconds"]}
+                retry = math.ceil(state["eta_seconds"]) if state["eta_seconds"] is not None else 60
+    raise HTTPException(status_code=429, detail=detail, headers={"Retry-After": str(max(retry, 1))})
+
+
+@contextmanager
+def admission(play_id: int, date_time: datetime, token: str | None):
+    """Hold this showtime's waiting-room admission for one booking.
+
+    Raises 429 unless `token` is admitted and unused. The admission is spent
+    when the block succeeds and handed back when it raises. Does nothing for
+    showtimes without a waiting room.
+    """
+    admitted = _admit(_key(play_id, date_time), token)
+    try:
+        yield
+    except BaseException:
+        if admitted is not None:
+            room, seq = admitted
+            with _lock:
+                room.used.discard(seq)
+        raise